@@ -7,36 +7,121 @@ import speech_recognition as sr
 from pydub import AudioSegment
 from pydub.utils import which
 import os
+from config import PERFORMANCE
+from noise_profile import NoiseProfileStore
 from utils import setup_logging
 
 class AudioHandler:
-    def __init__(self):
-        """Initialize audio handler"""
+    def __init__(self, noise_profiles=None):
+        """
+        Initialize audio handler
+        
+        Args:
+            noise_profiles: NoiseProfileStore used to skip per-recording calibration
+        """
         self.recognizer = sr.Recognizer()
+        self.recognizer.dynamic_energy_threshold = PERFORMANCE['dynamic_energy_threshold']
         self.logger = setup_logging()
+        self.noise_profiles = noise_profiles or NoiseProfileStore()
+        self._device_names = None
         
         # Set ffmpeg path if available
         AudioSegment.converter = which("ffmpeg")
         
-    def record_from_microphone(self, duration=5, sample_rate=16000):
+    def _device_name(self, device_index, source):
+        """
+        Return the profile key for a device index
+        
+        Args:
+            device_index: Microphone index (None for the system default)
+            source: The opened sr.Microphone, used to look up the default device
+        """
+        if device_index is None:
+            return self._default_device_name(source)
+            
+        if self._device_names is None or not 0 <= device_index < len(self._device_names):
+            # Devices may have been plugged in since the list was cached
+            self._device_names = self.list_microphones()
+        if 0 <= device_index < len(self._device_names):
+            return self._device_names[device_index]
+        return f"device-{device_index}"
+        
+    def _default_device_name(self, source):
+        """
+        Name of the current system default input device.
+        
+        Looked up on every recording, so switching the default microphone
+        (e.g. plugging in a headset) selects that device's noise profile.
+        The PyAudio instance the open microphone already holds is reused,
+        so the lookup adds no PortAudio initialisation.
+        """
+        try:
+            return source.audio.get_default_input_device_info()['name']
+        except Exception as e:
+            self.logger.warning(f"Could not resolve the default microphone: {e}")
+            return "default"
+            
+    def _apply_noise_profile(self, source, device_name):
+        """Set the energy threshold from the cached profile, calibrating only on a miss"""
+        energy_threshold = self.noise_profiles.get(device_name)
+        
+        if energy_threshold is None:
+            self.logger.info(f"Calibrating ambient noise for '{device_name}'...")
+            self.recognizer.adjust_for_ambient_noise(
+                source,
+                duration=PERFORMANCE['noise_calibration_seconds']
+            )
+            self.noise_profiles.set(device_name, self.recognizer.energy_threshold)
+        else:
+            self.recognizer.energy_threshold = energy_threshold
+            
+    def _update_noise_profile(self, device_name):
+        """Fold the threshold adapted on non-speech frames back into the profile"""
+        if self.recognizer.dynamic_energy_threshold:
+            self.noise_profiles.update(device_name, self.recognizer.energy_threshold)
+            
+    def calibrate(self, device_index=None, duration=None):
+        """
+        Measure ambient noise now and replace the stored profile
+        
+        Args:
+            device_index: Microphone index from list_microphones (None for default)
+            duration: Calibration duration in seconds
+            
+        Returns:
+            Measured energy threshold
+        """
+        with sr.Microphone(device_index=device_index) as source:
+            device_name = self._device_name(device_index, source)
+            self.recognizer.adjust_for_ambient_noise(
+                source,
+                duration=duration or PERFORMANCE['noise_calibration_seconds']
+            )
+        self.noise_profiles.set(device_name, self.recognizer.energy_threshold)
+        self.logger.info(f"Calibrated '{device_name}': {self.recognizer.energy_threshold:.1f}")
+        return self.recognizer.energy_threshold
+        
+    def record_from_microphone(self, duration=5, sample_rate=16000, device_index=None):
         """
         Record audio from microphone
         
         Args:
             duration: Recording duration in seconds
             sample_rate: Sample rate in Hz
+            device_index: Microphone index from list_microphones (None for default)
             
         Returns:
             AudioData object
         """
         try:
-            with sr.Microphone(sample_rate=sample_rate) as source:
-                self.logger.info("Adjusting for ambient noise...")
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            with sr.Microphone(device_index=device_index, sample_rate=sample_rate) as source:
+                device_name = self._device_name(device_index, source)
+                self._apply_noise_profile(source, device_name)
                 
                 self.logger.info(f"Recording for {duration} seconds...")
                 audio_data = self.recognizer.listen(source, timeout=duration+2, phrase_time_limit=duration)
                 
+                self._update_noise_profile(device_name)
                 self.logger.info("Recording complete")
                 return audio_data
                 
@@ -44,27 +129,45 @@ class AudioHandler:
             self.logger.error(f"Microphone recording error: {e}")
             raise
             
-    def record_continuous(self, callback, phrase_time_limit=5):
+    def record_continuous(self, callback, phrase_time_limit=5, device_index=None,
+                          source=None, stop_event=None):
         """
         Record audio continuously and call callback for each phrase
         
         Args:
             callback: Function to call with each audio chunk
             phrase_time_limit: Max seconds for each phrase
+            device_index: Microphone index from list_microphones (None for default)
+            source: Mono AudioSource to read instead of a microphone; recording
+                stops when it runs out of audio
+            stop_event: threading.Event that ends recording when set
         """
-        with sr.Microphone() as source:
-            self.logger.info("Adjusting for ambient noise...")
-            self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+        # File and synthetic sources have no ambient noise worth profiling
+        use_profile = source is None
+        if use_profile:
+            source = sr.Microphone(device_index=device_index)
             
+        with source:
+            device_name = self._device_name(device_index, source) if use_profile else None
+            if device_name is not None:
+                self._apply_noise_profile(source, device_name)
+                
             self.logger.info("Starting continuous recording...")
             
-            while True:
+            while stop_event is None or not stop_event.is_set():
                 try:
                     audio_data = self.recognizer.listen(
                         source,
                         phrase_time_limit=phrase_time_limit
                     )
-                    callback(audio_data)
+                    if device_name is not None:
+                        self._update_noise_profile(device_name)
+                        
+                    if audio_data.frame_data:
+                        callback(audio_data)
+                    if getattr(source, 'exhausted', False):
+                        self.logger.info("Audio source ended")
+                        break
                 except KeyboardInterrupt:
                     break
                 except Exception as e:
@@ -94,21 +197,15 @@ class AudioHandler:
                 self.logger.info(f"Converting {ext} to WAV format...")
                 audio = AudioSegment.from_file(file_path)
                 
-                # Convert to mono and set sample rate
+                # Convert to mono 16-bit and set sample rate
                 audio = audio.set_channels(1)
                 audio = audio.set_frame_rate(16000)
+                audio = audio.set_sample_width(2)
                 
-                # Export to temporary WAV file
-                temp_wav = "temp_audio.wav"
-                audio.export(temp_wav, format="wav")
+                # Build the AudioData in memory; a shared temporary WAV file
+                # would be overwritten by parallel file jobs
+                audio_data = sr.AudioData(audio.raw_data, audio.frame_rate, audio.sample_width)
                 
-                with sr.AudioFile(temp_wav) as source:
-                    audio_data = self.recognizer.record(source)
-                    
-                # Clean up temp file
-                if os.path.exists(temp_wav):
-                    os.remove(temp_wav)
-                    
                 self.logger.info(f"Loaded and converted file: {file_path}")
                 return audio_data
                 
@@ -0,0 +1,307 @@
+"""
+Audio Sources
+Interchangeable microphone, file-replay and synthetic audio inputs
+"""
+
+import time
+import numpy as np
+import speech_recognition as sr
+from pydub import AudioSegment
+from config import AUDIO_CONFIG
+
+
+class AudioSource(sr.AudioSource):
+    """
+    Base class for PCM audio inputs.
+
+    Sources work with speech_recognition (Recognizer.listen and
+    adjust_for_ambient_noise) and with CaptureManager. Subclasses
+    implement _open, _close and _read_frames; this class adds optional
+    pacing so file and synthetic sources can run at real time, at a
+    multiple of it, or as fast as possible.
+    """
+
+    def __init__(self, name, channels=1, sample_rate=None, chunk_size=None, speed=None):
+        """
+        Initialize the source.
+
+        Args:
+            name: Source name used to tag results
+            channels: Number of interleaved channels
+            sample_rate: Sample rate in Hz
+            chunk_size: Frames per read
+            speed: Playback speed relative to real time (None for unpaced)
+        """
+        # sr.AudioSource.__init__ only raises, so it is not called
+        self.name = name
+        self.channels = channels
+        self.sample_rate = sample_rate or AUDIO_CONFIG['sample_rate']
+        self.sample_width = 2
+        self.chunk_size = chunk_size or AUDIO_CONFIG['chunk_size']
+        self.speed = speed
+
+        self.stream = None
+        self.frames_read = 0
+        self.exhausted = False
+        self._started_at = None
+
+    # speech_recognition reads these upper-case attributes
+    @property
+    def SAMPLE_RATE(self):
+        return self.sample_rate
+
+    @property
+    def SAMPLE_WIDTH(self):
+        return self.sample_width
+
+    @property
+    def CHUNK(self):
+        return self.chunk_size
+
+    @property
+    def seconds_read(self):
+        """Seconds of audio delivered so far"""
+        return self.frames_read / self.sample_rate
+
+    def __enter__(self):
+        assert self.stream is None, "This audio source is already inside a context manager"
+        self._open()
+        self.frames_read = 0
+        self.exhausted = False
+        self._started_at = time.monotonic()
+        self.stream = _SourceStream(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self._close()
+        finally:
+            self.stream = None
+
+    def read(self, frames):
+        """
+        Read interleaved PCM bytes.
+
+        Args:
+            frames: Number of frames to read
+
+        Returns:
+            Up to frames frames of audio, or b"" once the source has ended
+        """
+        data = self._read_frames(frames)
+        if not data:
+            self.exhausted = True
+            return b""
+
+        self.frames_read += len(data) // (self.sample_width * self.channels)
+        self._pace()
+        return data
+
+    def _pace(self):
+        """Sleep so audio is delivered no faster than speed x real time"""
+        if not self.speed:
+            return
+        due = self._started_at + self.seconds_read / self.speed
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _open(self):
+        """Acquire resources"""
+
+    def _close(self):
+        """Release resources"""
+
+    def _read_frames(self, frames):
+        """Return interleaved PCM bytes, or b"" at end of input"""
+        raise NotImplementedError
+
+
+class _SourceStream:
+    """Stream object handed to speech_recognition, which calls stream.read(CHUNK)"""
+
+    def __init__(self, source):
+        self.source = source
+
+    def read(self, frames):
+        return self.source.read(frames)
+
+
+class MicrophoneSource(AudioSource):
+    """Live input from a PyAudio device"""
+
+    def __init__(self, device_index=None, channels=1, sample_rate=None, chunk_size=None, name=None):
+        """
+        Initialize the source (the device is opened on enter).
+
+        Args:
+            device_index: Device index from AudioHandler.list_microphones
+            channels: Number of channels to capture
+            sample_rate: Sample rate in Hz
+            chunk_size: Frames per buffer
+            name: Source name used to tag results
+        """
+        super().__init__(
+            name or ("default" if device_index is None else f"device-{device_index}"),
+            channels=channels,
+            sample_rate=sample_rate,
+            chunk_size=chunk_size
+        )
+        self.device_index = device_index
+        self._audio = None
+        self._stream = None
+
+    def _open(self):
+        pyaudio = sr.Microphone.get_pyaudio()
+        self._audio = pyaudio.PyAudio()
+        try:
+            self._stream = self._audio.open(
+                input_device_index=self.device_index,
+                channels=self.channels,
+                format=pyaudio.paInt16,
+                rate=self.sample_rate,
+                frames_per_buffer=self.chunk_size,
+                input=True
+            )
+        except Exception:
+            self._audio.terminate()
+            raise
+
+    def _close(self):
+        try:
+            self._stream.stop_stream()
+            self._stream.close()
+        finally:
+            self._stream = None
+            self._audio.terminate()
+
+    def _read_frames(self, frames):
+        return self._stream.read(frames, exception_on_overflow=False)
+
+
+class FileReplaySource(AudioSource):
+    """Replays an audio file as if it were being captured live"""
+
+    def __init__(self, file_path, speed=1.0, loops=1, channels=1, sample_rate=None,
+                 chunk_size=None, name=None):
+        """
+        Initialize the source (the file is decoded on enter).
+
+        Args:
+            file_path: Audio file in any format pydub can read
+            speed: Playback speed relative to real time (None for unpaced)
+            loops: Number of times to play the file (None to repeat forever)
+            channels: Channels to deliver; the file is up- or down-mixed
+            sample_rate: Sample rate in Hz
+            chunk_size: Frames per read
+            name: Source name used to tag results
+        """
+        super().__init__(
+            name or file_path,
+            channels=channels,
+            sample_rate=sample_rate,
+            chunk_size=chunk_size,
+            speed=speed
+        )
+        self.file_path = file_path
+        self.loops = loops
+        self._data = b""
+        self._offset = 0
+        self._loop = 0
+
+    def _open(self):
+        audio = AudioSegment.from_file(self.file_path)
+        audio = audio.set_channels(self.channels)
+        audio = audio.set_frame_rate(self.sample_rate)
+        audio = audio.set_sample_width(self.sample_width)
+        self._data = audio.raw_data
+        self._offset = 0
+        self._loop = 0
+
+    def _close(self):
+        self._data = b""
+
+    def _read_frames(self, frames):
+        if self._offset >= len(self._data):
+            self._loop += 1
+            if not self._data or (self.loops is not None and self._loop >= self.loops):
+                return b""
+            self._offset = 0
+
+        size = frames * self.channels * self.sample_width
+        data = self._data[self._offset:self._offset + size]
+        self._offset += len(data)
+        return data
+
+
+class SyntheticSource(AudioSource):
+    """
+    Generated speech-like audio for load testing without sound hardware.
+
+    Produces tone bursts (with vibrato so they are not perfectly
+    stationary) separated by low-level noise, which exercises the same
+    energy-based phrase detection as real speech.
+    """
+
+    def __init__(self, duration=None, speed=None, channels=1, burst_seconds=1.5,
+                 pause_seconds=1.0, amplitude=8000, noise_amplitude=50, seed=0,
+                 sample_rate=None, chunk_size=None, name=None):
+        """
+        Initialize the source.
+
+        Args:
+            duration: Seconds of audio to generate (None for endless)
+            speed: Playback speed relative to real time (None for unpaced)
+            channels: Number of channels; each gets an independent pattern
+            burst_seconds: Length of each tone burst
+            pause_seconds: Length of the noise gap between bursts
+            amplitude: Peak amplitude of the bursts
+            noise_amplitude: Standard deviation of the background noise
+            seed: Random seed for reproducible output
+            sample_rate: Sample rate in Hz
+            chunk_size: Frames per read
+            name: Source name used to tag results
+        """
+        super().__init__(
+            name or f"synthetic-{seed}",
+            channels=channels,
+            sample_rate=sample_rate,
+            chunk_size=chunk_size,
+            speed=speed
+        )
+        self.duration = duration
+        self.burst_seconds = burst_seconds
+        self.pause_seconds = pause_seconds
+        self.amplitude = amplitude
+        self.noise_amplitude = noise_amplitude
+        self.seed = seed
+        self._rng = None
+        self._position = 0
+
+    def _open(self):
+        self._rng = np.random.default_rng(self.seed)
+        self._position = 0
+
+    def _read_frames(self, frames):
+        if self.duration is not None:
+            remaining = int(self.duration * self.sample_rate) - self._position
+            frames = min(frames, remaining)
+        if frames <= 0:
+            return b""
+
+        t = (self._position + np.arange(frames)) / self.sample_rate
+        period = self.burst_seconds + self.pause_seconds
+
+        # Offset each channel's schedule and pitch so channels differ
+        offsets = np.arange(self.channels) * period / max(self.channels, 1)
+        phase = (t[:, None] + offsets[None, :]) % period
+        pitch = 150 + 50 * np.arange(self.channels)
+        vibrato = 1 + 0.05 * np.sin(2 * np.pi * 5 * t)[:, None]
+        bursts = np.sin(2 * np.pi * pitch[None, :] * vibrato * t[:, None])
+        bursts *= (phase < self.burst_seconds) * self.amplitude
+
+        noise = self._rng.normal(0, self.noise_amplitude, size=bursts.shape)
+        samples = np.clip(bursts + noise, -32768, 32767).astype('<i2')
+
+        self._position += frames
+        return samples.tobytes()
@@ -0,0 +1,161 @@
+"""
+Load Test
+Drives recognition from file-replay or synthetic sources and reports throughput
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from audio_handler import AudioHandler
+from audio_sources import FileReplaySource, SyntheticSource
+from capture_manager import CaptureManager
+from speech_recognizer import SpeechRecognizer
+
+
+def make_sources(count, duration, speed, file_path=None):
+    """
+    Create headless sources for a load test.
+
+    Args:
+        count: Number of concurrent sources
+        duration: Seconds of audio per source
+        speed: Playback speed relative to real time (None for unpaced)
+        file_path: Replay this file instead of generating audio
+
+    Returns:
+        List of AudioSource objects
+    """
+    if file_path:
+        return [
+            FileReplaySource(file_path, speed=speed, loops=None, name=f"replay-{i}")
+            for i in range(count)
+        ]
+    return [
+        SyntheticSource(duration=duration, speed=speed, seed=i, name=f"synthetic-{i}")
+        for i in range(count)
+    ]
+
+
+def run_capture_load(recognizer, sources, duration):
+    """Stream all sources through a CaptureManager"""
+    manager = CaptureManager(recognizer, sources)
+    manager.start()
+
+    # Replays loop forever, so stop them once duration worth of audio was read
+    while any(source.seconds_read < duration and not source.exhausted for source in sources):
+        time.sleep(0.1)
+    manager.stop()
+
+    return manager.audio_seconds, manager.segments_recognized
+
+
+def run_continuous_load(recognizer, sources, duration):
+    """Feed each source through AudioHandler.record_continuous on its own thread"""
+    lock = threading.Lock()
+    totals = {'audio_seconds': 0.0, 'phrases': 0}
+    stop_event = threading.Event()
+
+    def on_phrase(audio_data):
+        recognizer.recognize(audio_data)
+        with lock:
+            totals['phrases'] += 1
+            totals['audio_seconds'] += len(audio_data.frame_data) / (
+                audio_data.sample_rate * audio_data.sample_width
+            )
+
+    threads = [
+        threading.Thread(
+            target=AudioHandler().record_continuous,
+            args=(on_phrase,),
+            kwargs={'source': source, 'stop_event': stop_event},
+            daemon=True
+        )
+        for source in sources
+    ]
+    for thread in threads:
+        thread.start()
+
+    while any(thread.is_alive() for thread in threads):
+        if all(source.seconds_read >= duration for source in sources):
+            stop_event.set()
+        time.sleep(0.1)
+
+    return totals['audio_seconds'], totals['phrases']
+
+
+def measure_startup(runs, statement="import config"):
+    """
+    Time fresh interpreters running a statement, as a spawned worker would.
+
+    Each run starts in an empty working directory, so anything the
+    statement creates as a side effect is visible.
+
+    Args:
+        runs: Number of interpreters to start
+        statement: Python code run by each interpreter
+
+    Returns:
+        Tuple (median seconds above a bare interpreter, entries created in the working directory)
+    """
+    repo = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=repo)
+
+    def run(code, work_dir):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=work_dir, env=env, check=True)
+        return time.perf_counter() - start
+
+    # Alternate with bare interpreters so machine noise affects both alike
+    overheads = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as work_dir:
+            bare = run("pass", work_dir)
+            overheads.append(run(statement, work_dir) - bare)
+            created = sorted(os.listdir(work_dir))
+
+    return statistics.median(overheads), created
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless speech recognition load test")
+    parser.add_argument('--engine', default='wav2vec2', help="Recognition engine")
+    parser.add_argument('--sources', type=int, default=4, help="Concurrent sources")
+    parser.add_argument('--duration', type=float, default=60, help="Seconds of audio per source")
+    parser.add_argument('--speed', type=float, default=10,
+                        help="Playback speed relative to real time (0 for unpaced)")
+    parser.add_argument('--file', help="Replay this audio file instead of synthetic audio")
+    parser.add_argument('--mode', choices=['capture', 'continuous'], default='capture',
+                        help="Capture manager batching or record_continuous per source")
+    parser.add_argument('--startup', type=int, metavar='RUNS',
+                        help="Only measure worker startup (importing config) over RUNS interpreters")
+    args = parser.parse_args()
+
+    if args.startup:
+        for statement in ("import config", "import utils; utils.setup_logging()"):
+            seconds, created = measure_startup(args.startup, statement)
+            print(f"{statement + ':':36}{seconds * 1000:6.1f} ms, created {created or 'nothing'}")
+        return
+
+    recognizer = SpeechRecognizer(engine=args.engine)
+    sources = make_sources(args.sources, args.duration, args.speed or None, args.file)
+    run = run_capture_load if args.mode == 'capture' else run_continuous_load
+
+    start = time.perf_counter()
+    audio_seconds, units = run(recognizer, sources, args.duration)
+    elapsed = time.perf_counter() - start
+
+    print(f"Mode:               {args.mode}")
+    print(f"Sources:            {args.sources} @ {args.speed or 'unpaced'}x")
+    print(f"Audio read:         {sum(source.seconds_read for source in sources):.1f} s")
+    print(f"Audio recognized:   {audio_seconds:.1f} s in {units} segment(s)")
+    print(f"Wall time:          {elapsed:.1f} s")
+    print(f"Throughput:         {audio_seconds / elapsed:.2f}x real-time")
+
+
+if __name__ == "__main__":
+    main()
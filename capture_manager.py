@@ -0,0 +1,291 @@
+"""
+Capture Manager
+Concurrent capture from several microphones or channels with shared recognition
+"""
+
+import queue
+import threading
+import time
+import numpy as np
+import speech_recognition as sr
+from config import AUDIO_CONFIG, PERFORMANCE
+from utils import setup_logging
+
+
+def deinterleave(raw_data, channels, sample_width=2):
+    """
+    Split interleaved PCM frames into one array per channel.
+
+    Args:
+        raw_data: Interleaved little-endian PCM bytes
+        channels: Number of interleaved channels
+        sample_width: Bytes per sample (2 for int16, 4 for int32)
+
+    Returns:
+        Array of shape (channels, frames)
+    """
+    samples = np.frombuffer(raw_data, dtype=f"<i{sample_width}")
+    usable = len(samples) - len(samples) % channels
+    return samples[:usable].reshape(-1, channels).T
+
+
+class CaptureResult:
+    """Transcription of one segment from one source channel"""
+
+    def __init__(self, source, channel, start_time, end_time, text):
+        self.source = source
+        self.channel = channel
+        self.start_time = start_time
+        self.end_time = end_time
+        self.text = text
+
+    @property
+    def tag(self):
+        """Source and channel as a single label"""
+        return f"{self.source}:ch{self.channel}"
+
+    def __repr__(self):
+        return f"CaptureResult({self.tag}, {self.start_time:.2f}-{self.end_time:.2f}, {self.text!r})"
+
+
+class _Segment:
+    """Audio waiting for recognition"""
+
+    def __init__(self, source, channel, start_time, audio_data):
+        self.source = source
+        self.channel = channel
+        self.start_time = start_time
+        self.audio_data = audio_data
+
+    @property
+    def duration(self):
+        audio = self.audio_data
+        return len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+
+
+class CaptureManager:
+    """Captures several streams in parallel and transcribes them with a shared worker pool"""
+
+    def __init__(self, recognizer, streams, callback=None, segment_seconds=None,
+                 min_rms=None, batch_size=None, workers=None):
+        """
+        Initialize the manager.
+
+        Args:
+            recognizer: SpeechRecognizer shared by all recognition workers
+            streams: AudioSource objects (microphones, file replays, synthetic)
+            callback: Called with each CaptureResult from a worker thread
+            segment_seconds: Audio per channel collected before recognition
+            min_rms: Segments quieter than this RMS are dropped as silence
+            batch_size: Maximum segments recognized in one call
+            workers: Number of recognition worker threads
+        """
+        self.recognizer = recognizer
+        self.streams = list(streams)
+        self.callback = callback
+        self.segment_seconds = segment_seconds or AUDIO_CONFIG['segment_seconds']
+        self.min_rms = min_rms if min_rms is not None else AUDIO_CONFIG['min_segment_rms']
+        self.batch_size = batch_size or PERFORMANCE['recognition_batch_size']
+        self.workers = workers or PERFORMANCE['recognition_workers']
+        self.logger = setup_logging()
+
+        self.results = queue.Queue()
+        self._segments = queue.Queue()
+        self._stop_event = threading.Event()
+        self._capture_threads = []
+        self._worker_threads = []
+
+        self._stats_lock = threading.Lock()
+        self._started_at = None
+        self.audio_seconds = 0.0
+        self.segments_recognized = 0
+        self.batches = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self):
+        """Open every stream and start capture and recognition threads"""
+        self._stop_event.clear()
+        self._started_at = time.monotonic()
+
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._recognition_worker, daemon=True)
+            thread.start()
+            self._worker_threads.append(thread)
+
+        for stream in self.streams:
+            thread = threading.Thread(target=self._capture, args=(stream,), daemon=True)
+            thread.start()
+            self._capture_threads.append(thread)
+
+        self.logger.info(
+            f"Capturing {len(self.streams)} stream(s) with {self.workers} recognition worker(s)"
+        )
+
+    def stop(self):
+        """Stop capturing, flush buffered audio and wait for recognition to finish"""
+        self._stop_event.set()
+        self.join()
+
+    def join(self):
+        """Wait until all streams have ended and every segment is recognized"""
+        for thread in self._capture_threads:
+            thread.join()
+        for _ in self._worker_threads:
+            self._segments.put(None)
+        for thread in self._worker_threads:
+            thread.join()
+        self._capture_threads = []
+        self._worker_threads = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Capture
+    # ------------------------------------------------------------------
+    def _capture(self, stream):
+        """Read one stream, de-interleave it and queue per-channel segments"""
+        segment_frames = int(self.segment_seconds * stream.sample_rate)
+        chunk_size = stream.chunk_size
+        buffers = [[] for _ in range(stream.channels)]
+        buffered = 0
+        position = 0
+
+        try:
+            with stream:
+                while not self._stop_event.is_set():
+                    raw_data = stream.read(chunk_size)
+                    if not raw_data:
+                        break
+
+                    frames = deinterleave(raw_data, stream.channels, stream.sample_width)
+                    for channel, samples in enumerate(frames):
+                        buffers[channel].append(samples)
+                    buffered += frames.shape[1]
+
+                    # Cut exact-length segments; the remainder starts the next one
+                    while buffered >= segment_frames:
+                        channels = [np.concatenate(chunks) for chunks in buffers]
+                        self._emit(stream, [samples[:segment_frames] for samples in channels], position)
+                        buffers = [[samples[segment_frames:]] for samples in channels]
+                        buffered -= segment_frames
+                        position += segment_frames
+
+        except Exception as e:
+            self.logger.error(f"Capture error on {stream.name}: {e}")
+
+        if buffered:
+            self._emit(stream, [np.concatenate(chunks) for chunks in buffers], position)
+        self.logger.info(f"Capture finished on {stream.name}")
+
+    def _emit(self, stream, channels, position):
+        """Queue the audio of every non-silent channel"""
+        start_time = position / stream.sample_rate
+
+        for channel, samples in enumerate(channels):
+            rms = np.sqrt(np.mean(samples.astype(np.float64) ** 2))
+            if rms < self.min_rms:
+                continue
+
+            audio_data = sr.AudioData(samples.tobytes(), stream.sample_rate, stream.sample_width)
+            self._segments.put(_Segment(stream.name, channel, start_time, audio_data))
+
+    # ------------------------------------------------------------------
+    # Recognition
+    # ------------------------------------------------------------------
+    def _next_batch(self):
+        """Block for one segment, then take whatever else is queued up to batch_size"""
+        first = self._segments.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                segment = self._segments.get_nowait()
+            except queue.Empty:
+                break
+            if segment is None:
+                # Leave the shutdown marker for this worker's next call
+                self._segments.put(None)
+                break
+            batch.append(segment)
+        return batch
+
+    def _recognition_worker(self):
+        """Recognize batches of segments across all sources"""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+
+            try:
+                texts = self.recognizer.recognize_batch([segment.audio_data for segment in batch])
+            except Exception as e:
+                self.logger.error(f"Batch recognition error: {e}")
+                texts = [None] * len(batch)
+
+            with self._stats_lock:
+                self.batches += 1
+                self.segments_recognized += len(batch)
+                self.audio_seconds += sum(segment.duration for segment in batch)
+
+            for segment, text in zip(batch, texts):
+                if not text:
+                    continue
+                result = CaptureResult(
+                    segment.source,
+                    segment.channel,
+                    segment.start_time,
+                    segment.start_time + segment.duration,
+                    text
+                )
+                self.results.put(result)
+                if self.callback:
+                    try:
+                        self.callback(result)
+                    except Exception as e:
+                        self.logger.error(f"Capture callback error: {e}")
+
+    @property
+    def realtime_factor(self):
+        """Recognized audio seconds per wall-clock second since start"""
+        if self._started_at is None:
+            return 0.0
+        elapsed = time.monotonic() - self._started_at
+        return self.audio_seconds / elapsed if elapsed > 0 else 0.0
+
+    def drain_results(self):
+        """Return every result recognized so far"""
+        results = []
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except queue.Empty:
+                return results
+
+
+def run_capture(recognizer, streams, duration, **kwargs):
+    """
+    Capture streams for a fixed time and return the results.
+
+    Args:
+        recognizer: SpeechRecognizer used for all streams
+        streams: AudioSource objects to capture
+        duration: Seconds to capture
+        **kwargs: Extra CaptureManager options
+
+    Returns:
+        List of CaptureResult ordered by start time
+    """
+    manager = CaptureManager(recognizer, streams, **kwargs)
+    manager.start()
+    time.sleep(duration)
+    manager.stop()
+    return sorted(manager.drain_results(), key=lambda result: (result.start_time, result.tag))
@@ -1,25 +1,96 @@
 """
 Configuration Settings
 Centralized configuration for the speech recognition system
+
+The dicts below hold the defaults. They are updated from a JSON file and
+environment variables the first time any of them is read (see Settings);
+importing this module has no side effects.
 """
 
 import os
+import threading
+
+CONFIG_FILE_VARIABLE = 'SPEECH_CONFIG_FILE'
+ENV_PREFIX = 'SPEECH_'
+
+
+def _copy_tree(value):
+    """Copy nested dicts and lists"""
+    if isinstance(value, dict):
+        return {key: _copy_tree(item) for key, item in dict.items(value)}
+    if isinstance(value, list):
+        return [_copy_tree(item) for item in value]
+    return value
+
+
+class _Section(dict):
+    """Settings dict that applies overrides before its first read"""
+
+    def _ensure_loaded(self):
+        if not settings.loaded:
+            settings.load()
+
+    def __getitem__(self, key):
+        self._ensure_loaded()
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        self._ensure_loaded()
+        return dict.__contains__(self, key)
+
+    def __iter__(self):
+        self._ensure_loaded()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self._ensure_loaded()
+        return dict.__len__(self)
+
+    def __repr__(self):
+        self._ensure_loaded()
+        return dict.__repr__(self)
+
+    def get(self, key, default=None):
+        self._ensure_loaded()
+        return dict.get(self, key, default)
+
+    def keys(self):
+        self._ensure_loaded()
+        return dict.keys(self)
+
+    def values(self):
+        self._ensure_loaded()
+        return dict.values(self)
+
+    def items(self):
+        self._ensure_loaded()
+        return dict.items(self)
+
+    def copy(self):
+        self._ensure_loaded()
+        return dict(dict.items(self))
+
 
 # Audio Settings
-AUDIO_CONFIG = {
+AUDIO_CONFIG = _Section({
     'sample_rate': 16000,
     'channels': 1,
     'chunk_size': 1024,
     'format': 'int16',
     'default_duration': 5,  # seconds
-}
+    'segment_seconds': 5,  # Audio per channel sent to recognition by the capture manager
+    'min_segment_rms': 300,  # Quieter capture segments are treated as silence
+})
 
 # Recognition Engine Settings
-ENGINE_CONFIG = {
+ENGINE_CONFIG = _Section({
     'google': {
         'name': 'Google Speech Recognition',
         'requires_internet': True,
-        'languages': ['en-US', 'es-ES', 'fr-FR', 'de-DE', 'ja-JP', 'zh-CN'],
+        'languages': [
+            'en-US', 'en-GB', 'es-ES', 'fr-FR', 'de-DE', 'it-IT',
+            'ja-JP', 'zh-CN', 'ko-KR', 'pt-BR', 'ru-RU', 'ar-SA'
+        ],
         'default_language': 'en-US'
     },
     'sphinx': {
@@ -32,38 +103,107 @@ ENGINE_CONFIG = {
         'name': 'Wav2Vec2',
         'requires_internet': False,  # After model download
         'model': 'facebook/wav2vec2-base-960h',
-        'languages': ['en'],
+        # Base language codes; region suffixes (en-US) are accepted and
+        # stripped. Must match MODEL_CONFIG['wav2vec2']['language_models'].
+        'languages': ['en', 'es', 'fr', 'de', 'it', 'ja', 'zh', 'ko', 'pt', 'ru', 'ar'],
         'default_language': 'en'
     }
-}
+})
 
 # Model Settings
-MODEL_CONFIG = {
+MODEL_CONFIG = _Section({
     'wav2vec2': {
         'model_name': 'facebook/wav2vec2-base-960h',
         'cache_dir': './models',
         'device': 'auto',  # 'auto', 'cpu', or 'cuda'
+        # Offline model per base language code
+        'language_models': {
+            'en': 'facebook/wav2vec2-base-960h',
+            'es': 'jonatasgrosman/wav2vec2-large-xlsr-53-spanish',
+            'fr': 'jonatasgrosman/wav2vec2-large-xlsr-53-french',
+            'de': 'jonatasgrosman/wav2vec2-large-xlsr-53-german',
+            'it': 'jonatasgrosman/wav2vec2-large-xlsr-53-italian',
+            'ja': 'jonatasgrosman/wav2vec2-large-xlsr-53-japanese',
+            'zh': 'jonatasgrosman/wav2vec2-large-xlsr-53-chinese-zh-cn',
+            'ko': 'kresnik/wav2vec2-large-xlsr-korean',
+            'pt': 'jonatasgrosman/wav2vec2-large-xlsr-53-portuguese',
+            'ru': 'jonatasgrosman/wav2vec2-large-xlsr-53-russian',
+            'ar': 'jonatasgrosman/wav2vec2-large-xlsr-53-arabic'
+        }
+    },
+    'language_id': {
+        # Fast pre-pass that picks the wav2vec2 model when no language is given
+        'enabled': True,
+        'model_name': 'facebook/mms-lid-126',
+        'max_seconds': 3,  # Audio inspected by the pre-pass
+        'fallback_language': 'en',  # Used when disabled or the result is unsupported
+        # The LID model is large (~1B parameters, ~3.9 GB in fp32). Pinned, it
+        # is never evicted and reloaded from disk on alternating LID / CTC
+        # requests; it still counts against the pool budget.
+        'pinned': True,
+        # ISO 639-3 labels of the LID model -> base language codes
+        'labels': {
+            'eng': 'en', 'spa': 'es', 'fra': 'fr', 'deu': 'de', 'ita': 'it', 'jpn': 'ja',
+            'cmn': 'zh', 'kor': 'ko', 'por': 'pt', 'rus': 'ru', 'arb': 'ar'
+        }
+    },
+    'pool': {
+        # Resident models shared by all recognizers, evicted least recently used
+        # first. Pinned models count too: the default fits the pinned LID model
+        # (~3.9 GB) plus one per-language model (~1.3 GB) for auto mode.
+        'memory_budget_mb': 6144,
+        'max_models': 3
+    },
+    'keyword_spotting': {
+        # Acoustic model used only to score keywords; can be smaller than
+        # the model used for full transcription
+        'model_name': 'facebook/wav2vec2-base-960h',
+        'threshold': 0.5,  # Minimum per-token confidence for a match
     }
-}
+})
+
+# Engine Routing Settings
+ROUTING_CONFIG = _Section({
+    'order': ['google', 'wav2vec2'],  # Fallback order
+    'deadlines': {  # Seconds each engine may take before the next is tried
+        'google': 10,
+        'sphinx': 15,
+        'wav2vec2': 30
+    },
+    'default_deadline': 30,
+    'hedge': True,  # Start hedge_engine in parallel when the primary is slow
+    'hedge_engine': 'wav2vec2',
+    'hedge_percentile': 95,  # Latency percentile after which to hedge
+    'hedge_after_seconds': 3.0,  # Used until min_samples latencies are recorded
+    'min_samples': 20,
+    'max_workers': 8  # Includes abandoned requests still finishing
+})
 
-# File Paths
-PATHS = {
+# Speaker Diarization Settings
+DIARIZATION_CONFIG = _Section({
+    'window_seconds': 1.5,  # Audio described by one speaker embedding
+    'hop_seconds': 0.5,  # Turn boundary resolution
+    'n_bands': 24,  # Mel bands per frame
+    'similarity_threshold': 0.5,  # Cosine similarity to join an existing speaker
+    'max_speakers': 8,
+    'min_turn_seconds': 1.0,  # Shorter turns are merged into the previous one
+    'block_seconds': 60,  # Audio processed at once (bounds memory on long files)
+    'refine_iterations': 3
+})
+
+# File Paths (directories are created on first use by get_path)
+PATHS = _Section({
     'output_dir': './output',
     'logs_dir': './logs',
     'models_dir': './models',
     'temp_dir': './temp',
-    'log_file': './logs/speech_recognition.log'
-}
-
-# Create directories if they don't exist
-for path in PATHS.values():
-    if path.endswith(('.log', '.txt')):
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-    else:
-        os.makedirs(path, exist_ok=True)
+    'log_file': './logs/speech_recognition.log',
+    'noise_profile_file': './models/noise_profiles.json',
+    'transcript_db': './output/transcripts.db'
+})
 
 # Logging Configuration
-LOGGING_CONFIG = {
+LOGGING_CONFIG = _Section({
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
@@ -85,7 +225,7 @@ LOGGING_CONFIG = {
             'class': 'logging.FileHandler',
             'level': 'DEBUG',
             'formatter': 'detailed',
-            'filename': PATHS['log_file'],
+            'filename': './logs/speech_recognition.log',  # Follows PATHS['log_file']
             'mode': 'a'
         }
     },
@@ -96,7 +236,7 @@ LOGGING_CONFIG = {
             'propagate': True
         }
     }
-}
+})
 
 # Supported Audio Formats
 SUPPORTED_FORMATS = [
@@ -105,7 +245,7 @@ SUPPORTED_FORMATS = [
 ]
 
 # Language Codes
-LANGUAGE_CODES = {
+LANGUAGE_CODES = _Section({
     'English (US)': 'en-US',
     'English (UK)': 'en-GB',
     'Spanish': 'es-ES',
@@ -118,14 +258,202 @@ LANGUAGE_CODES = {
     'Portuguese': 'pt-BR',
     'Russian': 'ru-RU',
     'Arabic': 'ar-SA'
-}
+})
 
 # Performance Settings
-PERFORMANCE = {
+PERFORMANCE = _Section({
     'max_file_size_mb': 100,
     'timeout_seconds': 30,
     'max_audio_length_seconds': 300,
     'energy_threshold': 4000,
     'dynamic_energy_threshold': True,
-    'pause_threshold': 0.8
-}
\ No newline at end of file
+    'pause_threshold': 0.8,
+    'noise_calibration_seconds': 0.5,  # Only used the first time a device is seen
+    'noise_profile_smoothing': 0.2,  # Weight of each recording in the stored profile
+    'chunk_seconds': 30,  # Audio per recognition call for long inputs
+    'max_concurrent_jobs': 2,  # Files transcribed in parallel by the GUI
+    'recognition_batch_size': 8,  # Segments per batched recognition call
+    'recognition_workers': 2,  # Threads shared by all capture streams
+    'ui_poll_ms': 50  # How often the GUI drains background results
+})
+
+
+class Settings:
+    """
+    Lazily loaded settings.
+
+    On first read the module-level dicts are updated in place, so code
+    that imported them directly sees the overrides:
+
+    1. the JSON file named by SPEECH_CONFIG_FILE, e.g.
+       {"PATHS": {"log_file": "/var/log/speech.log"}}
+    2. environment variables SPEECH_<SECTION>__<KEY>[__<KEY>...], e.g.
+       SPEECH_PERFORMANCE__MAX_CONCURRENT_JOBS=4; values are parsed as
+       JSON when possible and used as strings otherwise
+
+    Directories are only created when a path is requested via get_path.
+    """
+
+    def __init__(self, sections, environ=None):
+        """
+        Initialize the settings.
+
+        Args:
+            sections: Section name -> dict updated in place
+            environ: Environment mapping (defaults to os.environ)
+        """
+        self.sections = sections
+        self.environ = os.environ if environ is None else environ
+        self.loaded = False
+        self._applying = False
+        self._lock = threading.RLock()
+        self._defaults = None
+        self._created = set()
+        self._listeners = []
+
+    def load(self):
+        """Apply the config file and environment overrides (once)"""
+        # json is only needed when loading; keep it out of the import path
+        import json
+
+        with self._lock:
+            # Reads made while applying overrides see the sections as they are
+            if self.loaded or self._applying:
+                return
+            self._applying = True
+            try:
+                if self._defaults is None:
+                    self._defaults = {
+                        name: _copy_tree(section) for name, section in self.sections.items()
+                    }
+
+                file_path = self.environ.get(CONFIG_FILE_VARIABLE)
+                if file_path:
+                    with open(file_path, encoding='utf-8') as f:
+                        self._apply(json.load(f), file_path)
+                self._apply(self._environment_overrides(), "environment")
+                self._sync()
+                self.loaded = True
+            finally:
+                self._applying = False
+
+    def _environment_overrides(self):
+        """Collect SPEECH_<SECTION>__<KEY> variables into nested dicts"""
+        import json
+
+        overrides = {}
+        for variable, raw in self.environ.items():
+            if not variable.startswith(ENV_PREFIX) or variable == CONFIG_FILE_VARIABLE:
+                continue
+            section, *keys = variable[len(ENV_PREFIX):].split('__')
+            if not keys or section not in self.sections:
+                continue
+
+            try:
+                value = json.loads(raw)
+            except ValueError:
+                value = raw
+
+            target = overrides.setdefault(section, {})
+            for key in keys[:-1]:
+                target = target.setdefault(key.lower(), {})
+            target[keys[-1].lower()] = value
+        return overrides
+
+    def _apply(self, overrides, source):
+        """Merge overrides into the sections"""
+        for name, values in overrides.items():
+            if name not in self.sections:
+                raise ValueError(f"Unknown settings section '{name}' in {source}")
+            self._merge(self.sections[name], values)
+
+    def _merge(self, target, values):
+        """Recursively update target, replacing everything but nested dicts"""
+        for key, value in values.items():
+            if isinstance(value, dict) and isinstance(target.get(key), dict):
+                self._merge(target[key], value)
+            else:
+                target[key] = value
+
+    def _sync(self):
+        """Keep derived settings consistent with the paths"""
+        if 'PATHS' in self.sections and 'LOGGING_CONFIG' in self.sections:
+            handler = self.sections['LOGGING_CONFIG']['handlers']['file']
+            handler['filename'] = self.sections['PATHS']['log_file']
+
+    def override(self, overrides):
+        """
+        Change settings in this process only.
+
+        Meant for multiprocessing worker initializers, e.g. giving each
+        worker its own log file. The environment is not modified, so
+        other processes are unaffected.
+
+        Args:
+            overrides: Section name -> values, as in the config file
+        """
+        self.load()
+        with self._lock:
+            self._apply(overrides, "override")
+            self._sync()
+        self._notify()
+
+    def reset(self):
+        """Restore the defaults; overrides are applied again on next read"""
+        with self._lock:
+            if self._defaults is not None:
+                for name, section in self.sections.items():
+                    dict.clear(section)
+                    dict.update(section, _copy_tree(self._defaults[name]))
+            self.loaded = False
+            self._created.clear()
+
+    def add_listener(self, callback):
+        """
+        Register a callback run after override() changes settings.
+
+        Used by code that applied a setting once and has to follow changes,
+        e.g. the log file handler inherited by forked workers.
+
+        Args:
+            callback: Called without arguments
+        """
+        self._listeners.append(callback)
+
+    def _notify(self):
+        """Run the change listeners"""
+        for callback in self._listeners:
+            callback()
+
+    def get_path(self, name):
+        """
+        Return a configured path, creating its directory on first use.
+
+        Args:
+            name: Key of PATHS; '*_dir' entries are directories, the rest files
+
+        Returns:
+            The path
+        """
+        path = self.sections['PATHS'][name]
+        if path not in self._created:
+            directory = path if name.endswith('_dir') else os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._created.add(path)
+        return path
+
+
+settings = Settings({
+    'AUDIO_CONFIG': AUDIO_CONFIG,
+    'ENGINE_CONFIG': ENGINE_CONFIG,
+    'MODEL_CONFIG': MODEL_CONFIG,
+    'ROUTING_CONFIG': ROUTING_CONFIG,
+    'DIARIZATION_CONFIG': DIARIZATION_CONFIG,
+    'PATHS': PATHS,
+    'LOGGING_CONFIG': LOGGING_CONFIG,
+    'LANGUAGE_CODES': LANGUAGE_CODES,
+    'PERFORMANCE': PERFORMANCE
+})
+get_path = settings.get_path
+override = settings.override
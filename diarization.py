@@ -0,0 +1,391 @@
+"""
+Speaker Diarization
+Splits recordings into speaker turns and transcribes them per speaker
+"""
+
+import time
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from config import AUDIO_CONFIG, DIARIZATION_CONFIG, PERFORMANCE
+from utils import setup_logging, format_timestamp
+
+FRAME_SECONDS = 0.025
+FRAME_HOP_SECONDS = 0.010
+
+
+def mel_filterbank(n_bands, n_fft, sample_rate):
+    """
+    Triangular mel-spaced filterbank.
+
+    Args:
+        n_bands: Number of bands
+        n_fft: FFT size
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        Array of shape (n_bands, n_fft // 2 + 1)
+    """
+    def to_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+
+    def to_hz(mel):
+        return 700 * (10 ** (mel / 2595) - 1)
+
+    edges = to_hz(np.linspace(to_mel(60), to_mel(sample_rate / 2), n_bands + 2))
+    bins = np.fft.rfftfreq(n_fft, 1 / sample_rate)
+
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (bins - lower) / (center - lower)
+    falling = (upper - bins) / (upper - center)
+    return np.maximum(0, np.minimum(rising, falling)).astype(np.float32)
+
+
+class SpeakerSegment:
+    """A stretch of audio attributed to one speaker"""
+
+    def __init__(self, speaker, start_time, end_time, text=None):
+        self.speaker = speaker
+        self.start_time = start_time
+        self.end_time = end_time
+        self.text = text
+
+    @property
+    def duration(self):
+        return self.end_time - self.start_time
+
+    def __repr__(self):
+        return (f"SpeakerSegment(speaker {self.speaker}, "
+                f"{format_timestamp(self.start_time)}-{format_timestamp(self.end_time)}, {self.text!r})")
+
+
+class DiarizationResult:
+    """Per-speaker transcript with separate timings for each stage"""
+
+    def __init__(self, segments, speakers, timings):
+        self.segments = segments
+        self.speakers = speakers
+        self.timings = timings
+
+    def transcript(self):
+        """Readable transcript with one line per segment"""
+        return "\n".join(
+            f"[{format_timestamp(segment.start_time)}] Speaker {segment.speaker + 1}: {segment.text}"
+            for segment in self.segments
+            if segment.text
+        )
+
+
+class Diarizer:
+    """
+    Speaker-change segmentation from windowed spectral embeddings.
+
+    Each window is described by the mean and spread of its log mel band
+    energies. Windows are clustered by cosine similarity and consecutive
+    windows of one cluster become a turn. Audio is processed in blocks,
+    so memory stays bounded on hour-long inputs; only the small
+    per-window embeddings are kept for the whole recording.
+    """
+
+    def __init__(self, window_seconds=None, hop_seconds=None, n_bands=None,
+                 similarity_threshold=None, max_speakers=None, min_turn_seconds=None,
+                 block_seconds=None, min_rms=None):
+        """
+        Initialize the diarizer.
+
+        Args:
+            window_seconds: Audio described by one embedding
+            hop_seconds: Step between windows (turn boundary resolution)
+            n_bands: Mel bands per frame
+            similarity_threshold: Cosine similarity needed to join a speaker
+            max_speakers: Upper bound on distinct speakers
+            min_turn_seconds: Shorter turns are merged into a neighbour
+            block_seconds: Audio processed at once when computing embeddings
+            min_rms: Quieter frames are ignored; mostly quiet windows count as silence
+        """
+        config = DIARIZATION_CONFIG
+        self.window_seconds = window_seconds or config['window_seconds']
+        self.hop_seconds = hop_seconds or config['hop_seconds']
+        self.n_bands = n_bands or config['n_bands']
+        self.similarity_threshold = similarity_threshold or config['similarity_threshold']
+        self.max_speakers = max_speakers or config['max_speakers']
+        self.min_turn_seconds = min_turn_seconds if min_turn_seconds is not None else config['min_turn_seconds']
+        self.block_seconds = block_seconds or config['block_seconds']
+        self.min_rms = min_rms if min_rms is not None else AUDIO_CONFIG['min_segment_rms']
+        self.logger = setup_logging()
+
+    # ------------------------------------------------------------------
+    # Embeddings
+    # ------------------------------------------------------------------
+    def embed(self, samples, sample_rate):
+        """
+        Compute one spectral embedding per window.
+
+        Args:
+            samples: 1-D int16 array of mono audio
+            sample_rate: Sample rate in Hz
+
+        Returns:
+            Tuple (embeddings of shape (windows, 2 * n_bands), voiced mask)
+        """
+        frame_length = int(FRAME_SECONDS * sample_rate)
+        frame_hop = int(FRAME_HOP_SECONDS * sample_rate)
+        n_fft = 1 << (frame_length - 1).bit_length()
+        window_frames = int(round(self.window_seconds / FRAME_HOP_SECONDS))
+        hop_frames = int(round(self.hop_seconds / FRAME_HOP_SECONDS))
+
+        total_frames = 1 + (len(samples) - frame_length) // frame_hop if len(samples) >= frame_length else 0
+        total_windows = 1 + (total_frames - window_frames) // hop_frames if total_frames >= window_frames else 0
+        if total_windows == 0:
+            return np.zeros((0, 2 * self.n_bands), dtype=np.float32), np.zeros(0, dtype=bool)
+
+        filterbank = mel_filterbank(self.n_bands, n_fft, sample_rate)
+        taper = np.hanning(frame_length).astype(np.float32)
+        windows_per_block = max(1, int(self.block_seconds / self.hop_seconds))
+
+        embeddings = np.empty((total_windows, 2 * self.n_bands), dtype=np.float32)
+        sounding_share = np.empty(total_windows, dtype=np.float32)
+
+        for first in range(0, total_windows, windows_per_block):
+            last = min(first + windows_per_block, total_windows)
+
+            # Frames covering this block's windows
+            frame_start = first * hop_frames
+            frame_end = (last - 1) * hop_frames + window_frames
+            block = samples[frame_start * frame_hop:(frame_end - 1) * frame_hop + frame_length]
+            frames = sliding_window_view(block, frame_length)[::frame_hop].astype(np.float32)
+
+            power = np.abs(np.fft.rfft(frames * taper, n=n_fft)) ** 2
+            log_bands = np.log(power @ filterbank.T + 1e-6).astype(np.float64)
+            frame_energy = np.mean(frames ** 2, axis=1)
+
+            # Pauses would dominate the statistics, so only sounding frames count
+            sounding = (frame_energy >= self.min_rms ** 2)[:, None]
+            log_bands *= sounding
+
+            # Window statistics from running sums over frames
+            offsets = np.arange(last - first) * hop_frames
+            cumulative = np.vstack([np.zeros(self.n_bands), np.cumsum(log_bands, axis=0)])
+            cumulative_sq = np.vstack([np.zeros(self.n_bands), np.cumsum(log_bands ** 2, axis=0)])
+            cumulative_count = np.concatenate([[0], np.cumsum(sounding[:, 0])])
+
+            count = cumulative_count[offsets + window_frames] - cumulative_count[offsets]
+            safe_count = np.maximum(count, 1)[:, None]
+            mean = (cumulative[offsets + window_frames] - cumulative[offsets]) / safe_count
+            mean_sq = (cumulative_sq[offsets + window_frames] - cumulative_sq[offsets]) / safe_count
+            spread = np.sqrt(np.maximum(mean_sq - mean ** 2, 0))
+
+            embeddings[first:last] = np.hstack([mean, spread])
+            sounding_share[first:last] = count / window_frames
+
+        voiced = sounding_share >= 0.5
+        if voiced.any():
+            # Remove what all windows share (channel, room) so speakers stand out
+            embeddings -= embeddings[voiced].mean(axis=0)
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-9
+
+        return embeddings, voiced
+
+    # ------------------------------------------------------------------
+    # Clustering
+    # ------------------------------------------------------------------
+    def cluster(self, embeddings, voiced):
+        """
+        Assign a speaker label to every window.
+
+        An online leader pass seeds the speakers, then a few k-means style
+        passes refine them and speakers that ended up too similar are merged.
+        Every window is finally assigned to its most similar speaker.
+
+        Args:
+            embeddings: Unit-length window embeddings
+            voiced: Mask of windows that contain sound
+
+        Returns:
+            Array of labels per window (-1 for silence)
+        """
+        labels = np.full(len(embeddings), -1)
+        points = embeddings[voiced]
+        if len(points) == 0:
+            return labels
+
+        # Windows spanning a speaker change look like neither speaker; only
+        # windows that resemble both neighbours may found or shape a speaker
+        neighbour = np.sum(points[1:] * points[:-1], axis=1)
+        stability = np.minimum(np.append(neighbour, 1.0), np.insert(neighbour, 0, 1.0))
+        stable = points[stability >= self.similarity_threshold]
+        if len(stable) == 0:
+            stable = points
+
+        # Leader clustering: open a new speaker when nothing is similar enough
+        centroids = [stable[0]]
+        for point in stable[1:]:
+            similarity = np.array(centroids) @ point
+            if similarity.max() < self.similarity_threshold and len(centroids) < self.max_speakers:
+                centroids.append(point)
+        centroids = np.array(centroids)
+
+        for _ in range(DIARIZATION_CONFIG['refine_iterations']):
+            assignment = np.argmax(stable @ centroids.T, axis=1)
+            centroids = np.array([
+                stable[assignment == k].mean(axis=0) for k in range(len(centroids))
+                if np.any(assignment == k)
+            ])
+            centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-9
+            centroids = self._merge_similar(centroids)
+
+        assignment = np.argmax(points @ centroids.T, axis=1)
+
+        # Number speakers in order of first appearance
+        _, first_seen = np.unique(assignment, return_index=True)
+        order = np.argsort(np.argsort(first_seen))
+        remap = dict(zip(np.unique(assignment), order))
+        labels[voiced] = [remap[label] for label in assignment]
+        return labels
+
+    def _merge_similar(self, centroids):
+        """Merge centroids whose cosine similarity exceeds the threshold"""
+        merged = []
+        for centroid in centroids:
+            for index, existing in enumerate(merged):
+                if existing @ centroid / (np.linalg.norm(existing) + 1e-9) >= self.similarity_threshold:
+                    combined = existing + centroid
+                    merged[index] = combined / (np.linalg.norm(combined) + 1e-9)
+                    break
+            else:
+                merged.append(centroid)
+        return np.array(merged)
+
+    # ------------------------------------------------------------------
+    # Turns
+    # ------------------------------------------------------------------
+    def _smooth(self, labels):
+        """Replace single-window label flips with the surrounding label"""
+        smoothed = labels.copy()
+        flips = (labels[1:-1] != labels[:-2]) & (labels[:-2] == labels[2:])
+        smoothed[1:-1][flips] = labels[:-2][flips]
+        return smoothed
+
+    def turns(self, labels, duration):
+        """
+        Merge labelled windows into speaker turns.
+
+        Args:
+            labels: Speaker label per window (-1 for silence)
+            duration: Length of the audio in seconds
+
+        Returns:
+            List of SpeakerSegment without text
+        """
+        labels = self._smooth(labels) if len(labels) > 2 else labels
+        segments = []
+
+        # Each window stands for the hop centred on it; the first and last
+        # windows also cover the audio before and after them
+        offset = (self.window_seconds - self.hop_seconds) / 2
+        for index, label in enumerate(labels):
+            start = 0.0 if index == 0 else index * self.hop_seconds + offset
+            end = min(index * self.hop_seconds + offset + self.hop_seconds, duration)
+            if label < 0:
+                continue
+            if segments and segments[-1].speaker == label and abs(segments[-1].end_time - start) < 1e-6:
+                segments[-1].end_time = end
+            else:
+                segments.append(SpeakerSegment(int(label), start, end))
+
+        if segments and labels[-1] >= 0:
+            segments[-1].end_time = duration
+
+        # Fold turns that are too short into the previous turn
+        merged = []
+        for segment in segments:
+            if merged and segment.duration < self.min_turn_seconds:
+                merged[-1].end_time = max(merged[-1].end_time, segment.end_time)
+            elif merged and merged[-1].speaker == segment.speaker:
+                merged[-1].end_time = segment.end_time
+            else:
+                merged.append(segment)
+        return merged
+
+    def segment(self, audio_data):
+        """
+        Split audio into speaker turns.
+
+        Args:
+            audio_data: Mono AudioData object
+
+        Returns:
+            List of SpeakerSegment without text
+        """
+        raw_data = audio_data.get_raw_data(convert_width=2)
+        samples = np.frombuffer(raw_data, dtype="<i2")
+        duration = len(samples) / audio_data.sample_rate
+
+        embeddings, voiced = self.embed(samples, audio_data.sample_rate)
+        labels = self.cluster(embeddings, voiced)
+        return self.turns(labels, duration)
+
+    # ------------------------------------------------------------------
+    # Transcription
+    # ------------------------------------------------------------------
+    def transcribe(self, audio_data, recognizer, max_segment_seconds=None,
+                   progress_callback=None, cancel_event=None):
+        """
+        Diarize audio and transcribe every turn in batched recognition calls.
+
+        Args:
+            audio_data: Mono AudioData object (e.g. from AudioHandler.load_audio_file)
+            recognizer: SpeechRecognizer; recognize_batch is used for all turns
+            max_segment_seconds: Longer turns are split before recognition
+            progress_callback: Called with the completed fraction after each batch
+            cancel_event: threading.Event that stops processing when set
+
+        Returns:
+            DiarizationResult with per-speaker segments and stage timings,
+            or None if cancelled
+        """
+        max_segment_seconds = max_segment_seconds or PERFORMANCE['chunk_seconds']
+
+        started = time.perf_counter()
+        turns = self.segment(audio_data)
+        diarization_seconds = time.perf_counter() - started
+
+        # Split long turns so no recognition call exceeds the chunk length
+        segments = []
+        for turn in turns:
+            start = turn.start_time
+            while start < turn.end_time - 1e-6:
+                end = min(start + max_segment_seconds, turn.end_time)
+                segments.append(SpeakerSegment(turn.speaker, start, end))
+                start = end
+
+        started = time.perf_counter()
+        batch_size = PERFORMANCE['recognition_batch_size']
+        for first in range(0, len(segments), batch_size):
+            if cancel_event is not None and cancel_event.is_set():
+                self.logger.info("Diarized transcription cancelled")
+                return None
+
+            batch = segments[first:first + batch_size]
+            clips = [
+                audio_data.get_segment(int(segment.start_time * 1000), int(segment.end_time * 1000))
+                for segment in batch
+            ]
+            for segment, text in zip(batch, recognizer.recognize_batch(clips)):
+                segment.text = text
+
+            if progress_callback:
+                progress_callback(min(first + batch_size, len(segments)) / len(segments))
+        recognition_seconds = time.perf_counter() - started
+
+        duration = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+        speakers = len({segment.speaker for segment in segments})
+        timings = {
+            'audio_seconds': duration,
+            'diarization_seconds': diarization_seconds,
+            'recognition_seconds': recognition_seconds
+        }
+        self.logger.info(
+            f"Diarized {duration:.1f}s into {len(turns)} turn(s) from {speakers} speaker(s): "
+            f"diarization {diarization_seconds:.2f}s, recognition {recognition_seconds:.2f}s"
+        )
+        return DiarizationResult(segments, speakers, timings)
@@ -0,0 +1,309 @@
+"""
+Engine Router
+Tries recognition engines in order with deadlines, hedging slow requests
+"""
+
+import bisect
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from config import ROUTING_CONFIG
+from errors import AllEnginesFailedError, EngineTimeoutError, NoSpeechError, RecognitionError
+from speech_recognizer import SpeechRecognizer
+from utils import setup_logging
+
+
+class LatencyHistogram:
+    """Fixed log-spaced latency buckets with percentile estimates"""
+
+    # Bucket upper bounds in seconds, ~25% apart from 10 ms to ~2 min
+    BOUNDS = [0.01 * 1.25 ** i for i in range(43)]
+
+    def __init__(self):
+        """Initialize an empty histogram"""
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+
+    def record(self, seconds):
+        """Add one latency observation"""
+        index = bisect.bisect_left(self.BOUNDS, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+
+    def percentile(self, percent):
+        """
+        Estimate a latency percentile.
+
+        Args:
+            percent: Percentile between 0 and 100
+
+        Returns:
+            Upper bound of the bucket holding the percentile, or None if empty
+        """
+        with self._lock:
+            if self.count == 0:
+                return None
+            target = percent / 100 * self.count
+            seen = 0
+            for index, count in enumerate(self._counts):
+                seen += count
+                if seen >= target and count:
+                    return self.BOUNDS[min(index, len(self.BOUNDS) - 1)]
+            return self.BOUNDS[-1]
+
+
+class RoutingResult:
+    """Transcription returned by the router"""
+
+    def __init__(self, text, engine, latency, hedged=False):
+        self.text = text
+        self.engine = engine
+        self.latency = latency
+        self.hedged = hedged
+
+    def __repr__(self):
+        return f"RoutingResult({self.engine}, {self.latency:.2f}s, hedged={self.hedged}, {self.text!r})"
+
+
+class EngineRouter:
+    """
+    Routing policy over several recognition engines.
+
+    Engines are tried in order, each with its own deadline. While an
+    engine is running longer than its observed p95 latency, the hedge
+    engine is started in parallel; the first good answer wins and the
+    other requests are abandoned.
+    """
+
+    def __init__(self, language="en-US", order=None, deadlines=None, hedge=None,
+                 hedge_engine=None, recognizers=None):
+        """
+        Initialize the router.
+
+        Args:
+            language: Language code passed to engines created by the router
+            order: Engine names in fallback order
+            deadlines: Seconds allowed per engine
+            hedge: Whether to hedge slow requests
+            hedge_engine: Engine started in parallel when hedging
+            recognizers: Prebuilt recognizers by engine name; others are
+                created on first use
+        """
+        self.language = language
+        self.order = list(order or ROUTING_CONFIG['order'])
+        self.deadlines = dict(ROUTING_CONFIG['deadlines'], **(deadlines or {}))
+        self.hedge = ROUTING_CONFIG['hedge'] if hedge is None else hedge
+        self.hedge_engine = hedge_engine or ROUTING_CONFIG['hedge_engine']
+        self.logger = setup_logging()
+
+        self._recognizers = dict(recognizers or {})
+        self._recognizer_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=ROUTING_CONFIG['max_workers'])
+        self.histograms = {}
+
+    def _get_recognizer(self, engine):
+        """Return the recognizer for an engine, creating it on first use"""
+        with self._recognizer_lock:
+            if engine not in self._recognizers:
+                self._recognizers[engine] = SpeechRecognizer(engine=engine, language=self.language)
+            return self._recognizers[engine]
+
+    def _histogram(self, engine):
+        """Return an engine's latency histogram"""
+        return self.histograms.setdefault(engine, LatencyHistogram())
+
+    def _deadline(self, engine):
+        """Seconds allowed for an engine"""
+        return self.deadlines.get(engine, ROUTING_CONFIG['default_deadline'])
+
+    def hedge_delay(self, engine):
+        """
+        Seconds to wait on an engine before starting the hedge engine.
+
+        Uses the engine's latency percentile once enough samples exist,
+        otherwise the configured default.
+        """
+        histogram = self._histogram(engine)
+        if histogram.count >= ROUTING_CONFIG['min_samples']:
+            return histogram.percentile(ROUTING_CONFIG['hedge_percentile'])
+        return ROUTING_CONFIG['hedge_after_seconds']
+
+    def _run_engine(self, engine, audio_data):
+        """Worker: run one engine with its deadline"""
+        recognizer = self._get_recognizer(engine)
+        return recognizer.transcribe(audio_data, timeout=self._deadline(engine))
+
+    def transcribe(self, audio_data):
+        """
+        Recognize speech using the routing policy.
+
+        Args:
+            audio_data: AudioData object
+
+        Returns:
+            RoutingResult from the first engine that answered
+
+        Raises:
+            NoSpeechError: An engine reported that there is no speech
+            AllEnginesFailedError: No engine produced an answer
+        """
+        remaining = list(self.order)
+        launched = set()
+        inflight = {}
+        errors = []
+        hedged = False
+        no_speech = None
+
+        def launch(engine, is_hedge=False):
+            # The hedge engine need not be part of the fallback order
+            if engine in remaining:
+                remaining.remove(engine)
+            launched.add(engine)
+            started = time.monotonic()
+            future = self._pool.submit(self._run_engine, engine, audio_data)
+            deadline = started + self._deadline(engine)
+            inflight[future] = (engine, started, deadline, is_hedge)
+
+        def abandon_all():
+            for future in inflight:
+                future.cancel()
+            inflight.clear()
+
+        while inflight or remaining:
+            if not inflight:
+                launch(remaining[0])
+
+            # Wake up for the earliest deadline or hedge point
+            now = time.monotonic()
+            wake = min(deadline for _, _, deadline, _ in inflight.values())
+            hedge_at = None
+            if self.hedge and not hedged and self.hedge_engine not in launched:
+                hedge_at = min(
+                    started + self.hedge_delay(engine)
+                    for engine, started, _, _ in inflight.values()
+                )
+                wake = min(wake, hedge_at)
+
+            done, _ = wait(list(inflight), timeout=max(0.0, wake - now), return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+
+            for future in done:
+                engine, started, _, is_hedge = inflight.pop(future)
+                try:
+                    text = future.result()
+                except NoSpeechError as e:
+                    self._histogram(engine).record(now - started)
+                    # Only the primary's verdict is final; when the hedge finds
+                    # nothing, the primary may still return text
+                    if not is_hedge or not inflight:
+                        abandon_all()
+                        raise
+                    self.logger.info(f"Hedge engine {engine} found no speech; waiting for the primary")
+                    no_speech = e
+                    continue
+                except RecognitionError as e:
+                    self.logger.warning(f"Engine {engine} failed: {e}")
+                    errors.append(e)
+                    continue
+                except Exception as e:
+                    errors.append(RecognitionError(str(e), engine))
+                    continue
+
+                latency = now - started
+                self._histogram(engine).record(latency)
+                abandon_all()
+                return RoutingResult(text, engine, latency, hedged=is_hedge)
+
+            for future, (engine, started, deadline, _) in list(inflight.items()):
+                if now >= deadline:
+                    # Abandon the request; it finishes in the background
+                    self.logger.warning(f"Engine {engine} missed its {deadline - started:.1f}s deadline")
+                    self._histogram(engine).record(deadline - started)
+                    errors.append(EngineTimeoutError("Deadline exceeded", engine))
+                    future.cancel()
+                    del inflight[future]
+
+            # The hedge's no-speech verdict stands once nothing else can answer
+            if no_speech is not None and not inflight:
+                raise no_speech
+
+            if hedge_at is not None and now >= hedge_at and inflight:
+                self.logger.info(f"Hedging with {self.hedge_engine}")
+                launch(self.hedge_engine, is_hedge=True)
+                hedged = True
+
+        raise AllEnginesFailedError(errors)
+
+    def recognize(self, audio_data):
+        """
+        Recognize speech, returning None on failure like SpeechRecognizer.recognize
+        """
+        try:
+            return self.transcribe(audio_data).text
+        except RecognitionError as e:
+            self.logger.error(f"Recognition error: {e}")
+            return None
+
+    # Same chunking, progress and cancellation as SpeechRecognizer, with every
+    # chunk going through the routing policy via self.recognize
+    recognize_chunked = SpeechRecognizer.recognize_chunked
+    _recognize_chunks = SpeechRecognizer._recognize_chunks
+
+    def transcribe_chunked(self, audio_data, chunk_seconds=None,
+                           progress_callback=None, cancel_event=None):
+        """
+        Route long audio chunk by chunk, reporting which engines answered.
+
+        Args:
+            audio_data: AudioData object
+            chunk_seconds: Seconds of audio per routed request
+            progress_callback: Called with the completed fraction after each chunk
+            cancel_event: threading.Event that stops processing when set
+
+        Returns:
+            RoutingResult with the joined text, or None if nothing was
+            recognized or cancelled. Its engine names every engine that
+            answered a chunk, joined with "+" (e.g. "google+wav2vec2" when
+            the hedge answered some chunks); hedged is set if any chunk was.
+        """
+        answers = []
+
+        def recognize(segment):
+            try:
+                answer = self.transcribe(segment)
+            except RecognitionError as e:
+                self.logger.error(f"Recognition error: {e}")
+                return None
+            answers.append(answer)
+            return answer.text
+
+        started = time.monotonic()
+        text = self._recognize_chunks(recognize, audio_data, chunk_seconds,
+                                      progress_callback, cancel_event)
+        if text is None:
+            return None
+
+        engines = list(dict.fromkeys(answer.engine for answer in answers))
+        return RoutingResult(
+            text,
+            "+".join(engines),
+            time.monotonic() - started,
+            hedged=any(answer.hedged for answer in answers)
+        )
+
+    def latency_stats(self):
+        """Per-engine sample count and p50/p95 latency in seconds"""
+        return {
+            engine: {
+                'count': histogram.count,
+                'p50': histogram.percentile(50),
+                'p95': histogram.percentile(95)
+            }
+            for engine, histogram in self.histograms.items()
+        }
+
+    def shutdown(self):
+        """Release worker threads (abandoned requests finish in the background)"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,33 @@
+"""
+Recognition Errors
+Structured exceptions raised by recognition engines and the engine router
+"""
+
+
+class RecognitionError(Exception):
+    """Base class for recognition failures"""
+
+    def __init__(self, message, engine=None):
+        super().__init__(message)
+        self.engine = engine
+
+
+class NoSpeechError(RecognitionError):
+    """The engine ran but found no intelligible speech"""
+
+
+class EngineUnavailableError(RecognitionError):
+    """The engine cannot run (missing package, no network, service error)"""
+
+
+class EngineTimeoutError(RecognitionError):
+    """The engine did not answer within its deadline"""
+
+
+class AllEnginesFailedError(RecognitionError):
+    """Every engine in the routing order failed"""
+
+    def __init__(self, errors):
+        summary = "; ".join(f"{error.engine}: {error}" for error in errors)
+        super().__init__(f"All engines failed ({summary})")
+        self.errors = errors
@@ -5,23 +5,56 @@ Simple graphical interface using tkinter
 
 import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox
+import os
 import threading
+import queue
+import time
 from speech_recognizer import SpeechRecognizer
+from engine_router import EngineRouter
 from audio_handler import AudioHandler
-from utils import setup_logging, save_transcription
+from job_queue import JobExecutor, Job
+from transcript_store import TranscriptStore
+from diarization import Diarizer
+from config import PERFORMANCE, ENGINE_CONFIG, ROUTING_CONFIG
+from utils import setup_logging, save_transcription, format_timestamp
+
+# Drag-and-drop is optional: it needs the tkinterdnd2 package
+try:
+    from tkinterdnd2 import TkinterDnD, DND_FILES
+except ImportError:
+    TkinterDnD = None
+    DND_FILES = None
 
 class SpeechToTextGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Speech-to-Text System")
-        self.root.geometry("800x600")
+        self.root.geometry("900x750")
         
         self.logger = setup_logging()
         self.is_recording = False
         self.recognizer = None
         self.audio_handler = AudioHandler()
         
+        # Background work: jobs run on the executor, UI updates come back
+        # through ui_queue and are applied on the Tk thread by _poll_ui_queue
+        self.executor = JobExecutor(max_workers=PERFORMANCE['max_concurrent_jobs'])
+        # Model loads get their own worker so they neither wait behind file
+        # jobs nor get cancelled with them
+        self.loader = JobExecutor(max_workers=1)
+        self.ui_queue = queue.Queue()
+        self._file_jobs = {}
+        self._recognizers = {}
+        self._routers = {}
+        self._recognizer_loading = {}  # (engine, language) -> Event set when its load finishes
+        self._recognizer_lock = threading.Lock()
+        self.transcript_store = TranscriptStore()
+        self.diarizer = Diarizer()
+        
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self._poll_ui_queue()
+        self.load_engine()
         
     def setup_ui(self):
         """Setup the user interface"""
@@ -49,18 +82,42 @@ class SpeechToTextGUI:
             width=15
         )
         engine_combo.grid(row=0, column=1, sticky="w", padx=5)
+        engine_combo.bind("<<ComboboxSelected>>", lambda event: self.on_engine_selected())
         
         # Language selection
         ttk.Label(settings_frame, text="Language:").grid(row=0, column=2, sticky="w", padx=5)
         self.language_var = tk.StringVar(value="en-US")
-        language_combo = ttk.Combobox(
+        self.language_combo = language_combo = ttk.Combobox(
             settings_frame,
             textvariable=self.language_var,
-            values=["en-US", "es-ES", "fr-FR", "de-DE", "ja-JP", "zh-CN"],
+            values=self._engine_languages("google"),
             state="readonly",
             width=10
         )
         language_combo.grid(row=0, column=3, sticky="w", padx=5)
+        language_combo.bind("<<ComboboxSelected>>", lambda event: self.load_engine())
+        
+        # Concurrency selection
+        ttk.Label(settings_frame, text="Parallel jobs:").grid(row=0, column=4, sticky="w", padx=5)
+        self.concurrency_var = tk.IntVar(value=PERFORMANCE['max_concurrent_jobs'])
+        concurrency_spin = ttk.Spinbox(
+            settings_frame,
+            textvariable=self.concurrency_var,
+            from_=1,
+            to=16,
+            command=self.set_concurrency,
+            state="readonly",
+            width=5
+        )
+        concurrency_spin.grid(row=0, column=5, sticky="w", padx=5)
+        
+        # Speaker separation for meeting recordings
+        self.diarize_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            settings_frame,
+            text="Separate speakers",
+            variable=self.diarize_var
+        ).grid(row=0, column=6, sticky="w", padx=5)
         
         # Control Frame
         control_frame = ttk.Frame(self.root)
@@ -77,7 +134,7 @@ class SpeechToTextGUI:
         
         self.file_btn = ttk.Button(
             control_frame,
-            text="📁 Load Audio File",
+            text="📁 Load Audio Files",
             command=self.load_file,
             width=20
         )
@@ -99,6 +156,14 @@ class SpeechToTextGUI:
         )
         self.save_btn.pack(side="left", padx=5)
         
+        self.cancel_btn = ttk.Button(
+            control_frame,
+            text="✖ Cancel",
+            command=self.cancel_jobs,
+            width=15
+        )
+        self.cancel_btn.pack(side="left", padx=5)
+        
         # Status Label
         self.status_var = tk.StringVar(value="Ready")
         status_label = ttk.Label(
@@ -108,6 +173,42 @@ class SpeechToTextGUI:
         )
         status_label.pack(pady=5)
         
+        # Progress Bar
+        self.progress_var = tk.DoubleVar(value=0.0)
+        self.progress_bar = ttk.Progressbar(
+            self.root,
+            variable=self.progress_var,
+            maximum=100,
+            mode="determinate"
+        )
+        self.progress_bar.pack(fill="x", padx=10, pady=5)
+        
+        # Job Queue Panel
+        queue_frame = ttk.LabelFrame(self.root, text="Job Queue", padding=10)
+        queue_frame.pack(fill="x", padx=10, pady=5)
+        
+        self.job_tree = ttk.Treeview(
+            queue_frame,
+            columns=("file", "status", "progress"),
+            show="headings",
+            height=5
+        )
+        self.job_tree.heading("file", text="File")
+        self.job_tree.heading("status", text="Status")
+        self.job_tree.heading("progress", text="Progress")
+        self.job_tree.column("file", width=450)
+        self.job_tree.column("status", width=120)
+        self.job_tree.column("progress", width=80, anchor="e")
+        self.job_tree.pack(fill="x")
+        
+        self.throughput_var = tk.StringVar(value="")
+        ttk.Label(queue_frame, textvariable=self.throughput_var).pack(anchor="w", pady=(5, 0))
+        
+        # Accept dropped files when drag-and-drop support is available
+        if DND_FILES is not None and hasattr(self.root, "drop_target_register"):
+            self.root.drop_target_register(DND_FILES)
+            self.root.dnd_bind("<<Drop>>", self._on_drop)
+        
         # Text Display
         text_frame = ttk.LabelFrame(self.root, text="Transcription", padding=10)
         text_frame.pack(fill="both", expand=True, padx=10, pady=5)
@@ -120,6 +221,198 @@ class SpeechToTextGUI:
         )
         self.text_display.pack(fill="both", expand=True)
         
+    # ------------------------------------------------------------------
+    # Background plumbing
+    # ------------------------------------------------------------------
+    def _run_on_ui(self, func, *args):
+        """Schedule func(*args) on the Tk thread (safe from any thread)"""
+        self.ui_queue.put((func, args))
+        
+    def _poll_ui_queue(self):
+        """Apply pending UI updates and reschedule itself with root.after"""
+        while True:
+            try:
+                func, args = self.ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args)
+            except Exception as e:
+                self.logger.error(f"UI update error: {e}")
+                
+        self._refresh_queue_stats()
+        self.root.after(PERFORMANCE['ui_poll_ms'], self._poll_ui_queue)
+        
+    def _get_recognizer(self, engine, language):
+        """
+        Return a cached recognizer, loading its model on first use.
+        
+        The lock only guards the cache, so a slow model load does not
+        hold up jobs that use an engine which is already loaded.
+        Concurrent requests for the same engine wait for a single load.
+        """
+        key = (engine, language)
+        while True:
+            with self._recognizer_lock:
+                if key in self._recognizers:
+                    return self._recognizers[key]
+                    
+                pending = self._recognizer_loading.get(key)
+                if pending is None:
+                    self._recognizer_loading[key] = threading.Event()
+                    break
+                    
+            # Another thread is loading this engine; use its result
+            pending.wait()
+            
+        try:
+            recognizer = SpeechRecognizer(engine=engine, language=language)
+            with self._recognizer_lock:
+                self._recognizers[key] = recognizer
+            return recognizer
+        finally:
+            with self._recognizer_lock:
+                self._recognizer_loading.pop(key).set()
+            
+    def _get_transcriber(self, engine, language):
+        """
+        Return what the GUI recognizes with for an engine.
+        
+        Online engines go through an EngineRouter that tries the selected
+        engine first, falls back to the other configured engines when it
+        fails and hedges a stalled request; offline engines are used
+        directly.
+        """
+        recognizer = self._get_recognizer(engine, language)
+        if not ENGINE_CONFIG[engine]['requires_internet']:
+            return recognizer
+            
+        with self._recognizer_lock:
+            key = (engine, language)
+            if key not in self._routers:
+                fallbacks = [other for other in ROUTING_CONFIG['order'] if other != engine]
+                self._routers[key] = EngineRouter(
+                    language=language,
+                    order=[engine] + fallbacks,
+                    recognizers={engine: recognizer}
+                )
+            return self._routers[key]
+            
+    def _recognize(self, transcriber, engine, audio_data, progress_callback=None, cancel_event=None):
+        """
+        Recognize audio in chunks with a transcriber from _get_transcriber.
+        
+        Args:
+            transcriber: SpeechRecognizer or EngineRouter
+            engine: Selected engine name
+            audio_data: AudioData object (short clips are a single chunk)
+            progress_callback: Called with the completed fraction after each chunk
+            cancel_event: threading.Event that stops processing when set
+            
+        Returns:
+            Tuple (transcription or None, name of the engine that answered)
+        """
+        if isinstance(transcriber, EngineRouter):
+            result = transcriber.transcribe_chunked(
+                audio_data,
+                progress_callback=progress_callback,
+                cancel_event=cancel_event
+            )
+            return (result.text, result.engine) if result else (None, engine)
+            
+        text = transcriber.recognize_chunked(
+            audio_data,
+            progress_callback=progress_callback,
+            cancel_event=cancel_event
+        )
+        return text, engine
+        
+    def _set_progress(self, job, fraction):
+        """Progress callback for executor jobs (worker thread)"""
+        self._run_on_ui(self._update_job_row, job)
+        
+    @staticmethod
+    def _stored_language(language):
+        """Language recorded with a transcript ("auto" is unknown: the detected language is not reported)"""
+        return None if language == "auto" else language
+        
+    @staticmethod
+    def _engine_languages(engine):
+        """Languages offered for an engine (wav2vec2 can also detect it)"""
+        languages = list(ENGINE_CONFIG[engine]['languages'])
+        if engine == "wav2vec2":
+            languages.insert(0, "auto")
+        return languages
+        
+    def on_engine_selected(self):
+        """Restrict the language list to the selected engine, then load it"""
+        engine = self.engine_var.get()
+        languages = self._engine_languages(engine)
+        self.language_combo.config(values=languages)
+        
+        # Keep the base language when switching between en-US and en style codes
+        current = self.language_var.get()
+        matches = [code for code in languages if code.split("-")[0] == current.split("-")[0]]
+        if current not in languages:
+            self.language_var.set(matches[0] if matches else ENGINE_CONFIG[engine]['default_language'])
+            
+        self.load_engine()
+        
+    def load_engine(self):
+        """Load the selected engine's model in the background"""
+        engine = self.engine_var.get()
+        language = self.language_var.get()
+        
+        if (engine, language) in self._recognizers:
+            self.recognizer = self._recognizers[(engine, language)]
+            return
+            
+        self.status_var.set(f"⏳ Loading {engine} engine...")
+        self.loader.submit(
+            self._load_engine_job,
+            engine,
+            language,
+            name=f"load {engine} ({language})",
+            on_done=lambda job: self._run_on_ui(self._engine_loaded, job)
+        )
+        
+    def _load_engine_job(self, job, engine, language):
+        """Loader job: construct the recognizer"""
+        job.check_cancelled()
+        return self._get_recognizer(engine, language)
+        
+    def _engine_loaded(self, job):
+        """Handle a finished engine load (Tk thread)"""
+        if job.status == Job.DONE:
+            self.recognizer = job.result
+            self.status_var.set(f"✅ {job.result.engine} engine ready")
+        elif job.status == Job.FAILED:
+            self.status_var.set("❌ Error loading engine")
+            messagebox.showerror("Error", str(job.error))
+        elif job.status == Job.CANCELLED:
+            self.status_var.set("Engine load cancelled")
+            
+    def set_concurrency(self):
+        """Apply the selected number of parallel jobs"""
+        self.executor.set_max_workers(self.concurrency_var.get())
+        
+    def cancel_jobs(self):
+        """Cancel queued and running file jobs"""
+        self.executor.cancel_all()
+        self.status_var.set("✖ Cancelling...")
+        
+    def on_close(self):
+        """Stop background work and close the window"""
+        self.is_recording = False
+        self.executor.shutdown()
+        self.loader.shutdown()
+        for router in self._routers.values():
+            router.shutdown()
+        self.root.destroy()
+        
+    # ------------------------------------------------------------------
+    # Microphone
+    # ------------------------------------------------------------------
     def toggle_recording(self):
         """Start or stop recording"""
         if not self.is_recording:
@@ -133,8 +426,12 @@ class SpeechToTextGUI:
         self.record_btn.config(text="⏹️ Stop Recording")
         self.status_var.set("🔴 Recording...")
         
-        # Run recording in separate thread
-        thread = threading.Thread(target=self.record_audio)
+        # Run recording in separate thread; Tk variables are read here
+        # because they must not be touched from the worker
+        thread = threading.Thread(
+            target=self.record_audio,
+            args=(self.engine_var.get(), self.language_var.get())
+        )
         thread.daemon = True
         thread.start()
         
@@ -144,14 +441,11 @@ class SpeechToTextGUI:
         self.record_btn.config(text="🎤 Start Recording")
         self.status_var.set("Ready")
         
-    def record_audio(self):
-        """Record and transcribe audio"""
+    def record_audio(self, engine, language):
+        """Record and transcribe audio (worker thread)"""
         try:
             # Initialize recognizer
-            self.recognizer = SpeechRecognizer(
-                engine=self.engine_var.get(),
-                language=self.language_var.get()
-            )
+            transcriber = self._get_transcriber(engine, language)
             
             # Record audio
             audio_data = self.audio_handler.record_from_microphone(duration=5)
@@ -160,75 +454,211 @@ class SpeechToTextGUI:
                 return
                 
             # Update status
-            self.status_var.set("🔄 Processing...")
+            self._run_on_ui(self.status_var.set, "🔄 Processing...")
             
             # Recognize speech
-            text = self.recognizer.recognize(audio_data)
+            started = time.perf_counter()
+            text, answered_by = self._recognize(transcriber, engine, audio_data)
             
             if text:
-                # Update text display
-                self.text_display.insert(tk.END, text + "\n\n")
-                self.text_display.see(tk.END)
-                self.status_var.set("✅ Transcription complete")
+                self.transcript_store.add(
+                    text,
+                    source="microphone",
+                    engine=answered_by,
+                    language=self._stored_language(language),
+                    start_time=0.0,
+                    end_time=len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width),
+                    processing_seconds=time.perf_counter() - started
+                )
+                self._run_on_ui(self._append_text, text + "\n\n")
+                self._run_on_ui(self.status_var.set, "✅ Transcription complete")
             else:
-                self.status_var.set("❌ Could not understand audio")
-                messagebox.showwarning("Recognition Failed", "Could not understand audio")
+                self._run_on_ui(self.status_var.set, "❌ Could not understand audio")
+                self._run_on_ui(messagebox.showwarning, "Recognition Failed", "Could not understand audio")
                 
         except Exception as e:
             self.logger.error(f"Recording error: {e}")
-            self.status_var.set("❌ Error occurred")
-            messagebox.showerror("Error", str(e))
+            self._run_on_ui(self.status_var.set, "❌ Error occurred")
+            self._run_on_ui(messagebox.showerror, "Error", str(e))
             
         finally:
             self.is_recording = False
-            self.record_btn.config(text="🎤 Start Recording")
+            self._run_on_ui(self.record_btn.config, {"text": "🎤 Start Recording"})
             
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
     def load_file(self):
-        """Load and transcribe audio file"""
-        file_path = filedialog.askopenfilename(
-            title="Select Audio File",
+        """Queue one or more audio files for background transcription"""
+        file_paths = filedialog.askopenfilenames(
+            title="Select Audio Files",
             filetypes=[
                 ("Audio Files", "*.wav *.mp3 *.flac *.ogg *.m4a"),
                 ("All Files", "*.*")
             ]
         )
         
-        if not file_path:
-            return
+        if file_paths:
+            self.add_files(file_paths)
             
-        try:
-            self.status_var.set("📁 Loading file...")
+    def _on_drop(self, event):
+        """Queue files dropped onto the window"""
+        self.add_files(self.root.tk.splitlist(event.data))
+        
+    def add_files(self, file_paths):
+        """
+        Queue audio files for transcription.
+        
+        Args:
+            file_paths: Iterable of audio file paths
+        """
+        # Start a fresh batch for the overall progress bar once the previous one is done
+        if all(job.finished for job in self._file_jobs.values()):
+            self._file_jobs.clear()
             
-            # Initialize recognizer
-            self.recognizer = SpeechRecognizer(
-                engine=self.engine_var.get(),
-                language=self.language_var.get()
+        engine = self.engine_var.get()
+        language = self.language_var.get()
+        diarize = self.diarize_var.get()
+        
+        for file_path in file_paths:
+            if not os.path.isfile(file_path):
+                self.logger.warning(f"Skipping non-file drop target: {file_path}")
+                continue
+                
+            job = self.executor.submit(
+                self._transcribe_file_job,
+                file_path,
+                engine,
+                language,
+                diarize,
+                name=f"transcribe {file_path}",
+                on_progress=self._set_progress,
+                on_done=lambda job, path=file_path: self._run_on_ui(self._file_job_done, job, path)
+            )
+            self._file_jobs[job.id] = job
+            self.job_tree.insert(
+                "", tk.END, iid=str(job.id),
+                values=(os.path.basename(file_path), job.status, "0%")
             )
             
-            # Load audio
-            audio_data = self.audio_handler.load_audio_file(file_path)
+        self.status_var.set(f"📁 {self.executor.pending_count} job(s) queued")
+        
+    def _transcribe_file_job(self, job, file_path, engine, language, diarize=False):
+        """Executor job: load and transcribe one file"""
+        recognizer = self._get_recognizer(engine, language)
+        job.check_cancelled()
+        
+        audio_data = self.audio_handler.load_audio_file(file_path)
+        job.audio_seconds = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+        job.check_cancelled()
+        
+        self._run_on_ui(self._update_job_row, job)
+        if diarize:
+            return self._transcribe_speakers(job, file_path, audio_data, recognizer, engine, language)
+            
+        started = time.perf_counter()
+        text, answered_by = self._recognize(
+            self._get_transcriber(engine, language),
+            engine,
+            audio_data,
+            progress_callback=job.report_progress,
+            cancel_event=job.cancel_event
+        )
+        job.check_cancelled()
+        
+        if text:
+            self.transcript_store.add(
+                text,
+                source=file_path,
+                engine=answered_by,
+                language=self._stored_language(language),
+                start_time=0.0,
+                end_time=job.audio_seconds,
+                processing_seconds=time.perf_counter() - started
+            )
+        return text
+        
+    def _transcribe_speakers(self, job, file_path, audio_data, recognizer, engine, language):
+        """Split a file into speaker turns and store one transcript per turn"""
+        result = self.diarizer.transcribe(
+            audio_data,
+            recognizer,
+            progress_callback=job.report_progress,
+            cancel_event=job.cancel_event
+        )
+        job.check_cancelled()
+        
+        records = [
+            {
+                'text': f"Speaker {segment.speaker + 1}: {segment.text}",
+                'source': file_path,
+                'engine': engine,
+                'language': self._stored_language(language),
+                'start_time': segment.start_time,
+                'end_time': segment.end_time
+            }
+            for segment in result.segments
+            if segment.text
+        ]
+        if records:
+            self.transcript_store.add_many(records)
+        return result.transcript()
+        
+    def _file_job_done(self, job, file_path):
+        """Show the outcome of a file job (Tk thread)"""
+        self._update_job_row(job)
+        
+        if job.status == Job.DONE and job.result:
+            self._append_text(f"[{file_path}]\n{job.result}\n\n")
+        elif job.status == Job.DONE:
+            self.job_tree.set(str(job.id), "status", "no speech")
+        elif job.status == Job.FAILED:
+            self.job_tree.set(str(job.id), "status", f"failed: {job.error}")
             
-            self.status_var.set("🔄 Processing...")
+        if all(queued.finished for queued in self._file_jobs.values()):
+            self.status_var.set("✅ All files processed")
             
-            # Recognize speech
-            text = self.recognizer.recognize(audio_data)
+    def _update_job_row(self, job):
+        """Refresh a job's row in the queue panel (Tk thread)"""
+        item = str(job.id)
+        if self.job_tree.exists(item):
+            self.job_tree.set(item, "status", job.status)
+            self.job_tree.set(item, "progress", f"{job.progress * 100:.0f}%")
             
-            if text:
-                self.text_display.insert(tk.END, f"[{file_path}]\n{text}\n\n")
-                self.text_display.see(tk.END)
-                self.status_var.set("✅ File transcribed")
-            else:
-                self.status_var.set("❌ Could not transcribe audio")
-                messagebox.showwarning("Transcription Failed", "Could not transcribe audio")
-                
-        except Exception as e:
-            self.logger.error(f"File loading error: {e}")
-            self.status_var.set("❌ Error occurred")
-            messagebox.showerror("Error", str(e))
+    def _refresh_queue_stats(self):
+        """Update the overall progress bar and throughput figures"""
+        if not self._file_jobs:
+            return
             
+        jobs = self._file_jobs.values()
+        done = sum(1.0 if job.finished else job.progress for job in jobs)
+        self.progress_var.set(done / len(self._file_jobs) * 100)
+        
+        stats = self.executor.stats
+        remaining = sum(1 for job in jobs if not job.finished)
+        eta = stats.eta(remaining)
+        eta_text = format_timestamp(eta) if eta is not None else "--:--"
+        self.throughput_var.set(
+            f"Completed: {stats.completed}  |  "
+            f"Speed: {stats.realtime_factor:.2f}x real-time  |  "
+            f"Remaining: {remaining}  |  ETA: {eta_text}"
+        )
+        
+    def _append_text(self, text):
+        """Append text to the transcription view (Tk thread)"""
+        self.text_display.insert(tk.END, text)
+        self.text_display.see(tk.END)
+        
     def clear_text(self):
-        """Clear text display"""
+        """Clear text display and finished jobs"""
         self.text_display.delete(1.0, tk.END)
+        for job_id, job in list(self._file_jobs.items()):
+            if job.finished:
+                self.job_tree.delete(str(job_id))
+                del self._file_jobs[job_id]
+        if not self._file_jobs:
+            self.progress_var.set(0)
+            self.throughput_var.set("")
         self.status_var.set("Ready")
         
     def save_text(self):
@@ -256,7 +686,7 @@ class SpeechToTextGUI:
                 messagebox.showerror("Error", f"Failed to save file: {e}")
 
 def main():
-    root = tk.Tk()
+    root = TkinterDnD.Tk() if TkinterDnD is not None else tk.Tk()
     app = SpeechToTextGUI(root)
     root.mainloop()
 
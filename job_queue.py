@@ -0,0 +1,333 @@
+"""
+Background Job Queue
+Runs transcription jobs off the GUI thread with progress and cancellation
+"""
+
+import itertools
+import queue
+import threading
+import time
+from utils import setup_logging
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested"""
+
+
+class Job:
+    """A unit of background work tracked by the JobExecutor"""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, job_id, func, args=(), kwargs=None, name=None,
+                 on_progress=None, on_done=None):
+        """
+        Create a job.
+
+        Args:
+            job_id: Unique job identifier
+            func: Callable run as func(job, *args, **kwargs)
+            args: Positional arguments for func
+            kwargs: Keyword arguments for func
+            name: Display name of the job
+            on_progress: Called with (job, fraction) when progress changes
+            on_done: Called with (job) once the job has finished
+        """
+        self.id = job_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.name = name or f"job-{job_id}"
+        self.on_progress = on_progress
+        self.on_done = on_done
+
+        self.status = Job.PENDING
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.audio_seconds = 0.0  # Set by the job; feeds throughput stats
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        """Whether cancellation has been requested"""
+        return self.cancel_event.is_set()
+
+    @property
+    def finished(self):
+        """Whether the job reached a terminal state"""
+        return self.status in (Job.DONE, Job.FAILED, Job.CANCELLED)
+
+    def cancel(self):
+        """Request cancellation; running jobs stop at their next check"""
+        self.cancel_event.set()
+
+    def check_cancelled(self):
+        """Raise JobCancelled if cancellation was requested"""
+        if self.cancelled:
+            raise JobCancelled(self.name)
+
+    def report_progress(self, fraction):
+        """
+        Report progress from inside the job.
+
+        Args:
+            fraction: Completed fraction between 0.0 and 1.0
+        """
+        self.progress = max(0.0, min(1.0, fraction))
+        if self.on_progress:
+            self.on_progress(self, self.progress)
+
+
+class ThroughputStats:
+    """Live throughput figures for an executor"""
+
+    def __init__(self):
+        """Initialize empty statistics"""
+        self._lock = threading.Lock()
+        self._active = 0
+        self._busy_since = None
+        self._busy_seconds = 0.0
+        self.completed = 0
+        self.audio_seconds = 0.0
+
+    def job_started(self):
+        """Record that a job began running"""
+        with self._lock:
+            if self._active == 0:
+                self._busy_since = time.monotonic()
+            self._active += 1
+
+    def job_finished(self, audio_seconds=0.0, counted=True):
+        """
+        Record that a running job ended.
+
+        Args:
+            audio_seconds: Seconds of audio the job transcribed
+            counted: Whether the job counts towards completed work
+        """
+        with self._lock:
+            self._active -= 1
+            if self._active == 0:
+                self._busy_seconds += time.monotonic() - self._busy_since
+                self._busy_since = None
+            if counted:
+                self.completed += 1
+                self.audio_seconds += audio_seconds
+
+    @property
+    def busy_seconds(self):
+        """Wall-clock seconds during which at least one job was running"""
+        with self._lock:
+            busy = self._busy_seconds
+            if self._busy_since is not None:
+                busy += time.monotonic() - self._busy_since
+            return busy
+
+    @property
+    def realtime_factor(self):
+        """Audio seconds transcribed per wall-clock second"""
+        busy = self.busy_seconds
+        return self.audio_seconds / busy if busy > 0 else 0.0
+
+    def eta(self, pending_jobs):
+        """
+        Estimate seconds until pending_jobs more jobs are done.
+
+        Args:
+            pending_jobs: Number of queued or running jobs
+
+        Returns:
+            Estimated seconds, or None before the first job completes
+        """
+        if self.completed == 0:
+            return None
+        return pending_jobs * self.busy_seconds / self.completed
+
+
+class JobExecutor:
+    """Pool of worker threads that execute queued jobs"""
+
+    def __init__(self, max_workers=1):
+        """
+        Initialize the executor and start its worker threads.
+
+        Args:
+            max_workers: Number of jobs allowed to run at the same time
+        """
+        self.logger = setup_logging()
+        self.stats = ThroughputStats()
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._workers_changed = threading.Condition(self._lock)
+        self._shutdown = False
+        self._max_workers = 0
+        self._workers = []
+
+        self.set_max_workers(max_workers)
+
+    @property
+    def max_workers(self):
+        """Number of jobs allowed to run at the same time"""
+        return self._max_workers
+
+    @property
+    def pending_count(self):
+        """Number of jobs that are queued or running"""
+        return len(self._jobs)
+
+    def set_max_workers(self, max_workers):
+        """
+        Change the concurrency level.
+
+        Lowering it lets running jobs finish; surplus workers stop taking
+        new jobs once they are idle.
+
+        Args:
+            max_workers: Number of jobs allowed to run at the same time
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
+        with self._workers_changed:
+            self._max_workers = max_workers
+            while len(self._workers) < max_workers:
+                worker = threading.Thread(
+                    target=self._run,
+                    args=(len(self._workers),),
+                    daemon=True
+                )
+                self._workers.append(worker)
+                worker.start()
+            self._workers_changed.notify_all()
+
+        self.logger.info(f"Job concurrency set to {max_workers}")
+
+    def submit(self, func, *args, name=None, on_progress=None, on_done=None, **kwargs):
+        """
+        Queue a job for background execution.
+
+        Args:
+            func: Callable run as func(job, *args, **kwargs)
+            name: Display name of the job
+            on_progress: Called with (job, fraction) from the worker thread
+            on_done: Called with (job) from the worker thread when finished
+
+        Returns:
+            The queued Job
+        """
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Executor has been shut down")
+            job = Job(next(self._ids), func, args, kwargs, name=name,
+                      on_progress=on_progress, on_done=on_done)
+            self._jobs[job.id] = job
+
+        self._queue.put(job)
+        self.logger.info(f"Queued {job.name}")
+        return job
+
+    def cancel(self, job_id):
+        """
+        Cancel a pending or running job.
+
+        Args:
+            job_id: Identifier returned by submit
+
+        Returns:
+            True if the job existed and was not yet finished
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.cancel()
+        self.logger.info(f"Cancellation requested for {job.name}")
+        return True
+
+    def cancel_all(self):
+        """Cancel every unfinished job"""
+        for job_id in list(self._jobs):
+            self.cancel(job_id)
+
+    def get_job(self, job_id):
+        """Return the job with the given identifier, or None"""
+        return self._jobs.get(job_id)
+
+    def shutdown(self, wait=False):
+        """
+        Stop accepting jobs and cancel the outstanding ones.
+
+        Args:
+            wait: Block until the worker thread has exited
+        """
+        with self._workers_changed:
+            self._shutdown = True
+            self._workers_changed.notify_all()
+        self.cancel_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def _run(self, index):
+        """
+        Worker loop.
+
+        Args:
+            index: Worker slot; slots at or above max_workers stay idle
+        """
+        while True:
+            with self._workers_changed:
+                while index >= self._max_workers and not self._shutdown:
+                    self._workers_changed.wait()
+                if self._shutdown:
+                    break
+
+            try:
+                job = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            self._execute(job)
+
+        # Drain jobs nobody will run so their callbacks still fire
+        while True:
+            try:
+                self._execute(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+    def _execute(self, job):
+        """Run a single job and record its outcome"""
+        if job.cancelled:
+            job.status = Job.CANCELLED
+        else:
+            job.status = Job.RUNNING
+            self.stats.job_started()
+            try:
+                job.result = job.func(job, *job.args, **job.kwargs)
+                job.status = Job.DONE
+            except JobCancelled:
+                job.status = Job.CANCELLED
+            except Exception as e:
+                self.logger.error(f"{job.name} failed: {e}")
+                job.error = e
+                job.status = Job.FAILED
+            self.stats.job_finished(
+                job.audio_seconds,
+                counted=job.status == Job.DONE and job.audio_seconds > 0
+            )
+
+        self.logger.info(f"{job.name} finished with status: {job.status}")
+        with self._lock:
+            self._jobs.pop(job.id, None)
+
+        if job.on_done:
+            try:
+                job.on_done(job)
+            except Exception as e:
+                self.logger.error(f"Completion callback for {job.name} failed: {e}")
@@ -0,0 +1,283 @@
+"""
+Keyword Spotter
+Detects configured keywords directly from Wav2Vec2 CTC output
+"""
+
+import threading
+import time
+import numpy as np
+from config import MODEL_CONFIG
+from speech_recognizer import SpeechRecognizer
+from utils import setup_logging
+
+
+def ctc_keyword_score(log_probs, token_ids, blank_id):
+    """
+    Find the best alignment of a token sequence anywhere in CTC output.
+
+    Scores are measured relative to the best unconstrained path, so a
+    keyword that the greedy decoder would output verbatim scores 0 and
+    every frame where the keyword path disagrees with the top token adds
+    a negative penalty.
+
+    Args:
+        log_probs: Per-frame log-probabilities, shape (frames, vocab)
+        token_ids: Token ids of the keyword
+        blank_id: CTC blank token id
+
+    Returns:
+        Tuple (score, start_frame, end_frame); score is -inf if the
+        keyword cannot fit in the available frames
+    """
+    # Keyword path with blanks between (and around) the tokens
+    labels = np.full(2 * len(token_ids) + 1, blank_id)
+    labels[1::2] = token_ids
+    states = len(labels)
+
+    # A state may skip the blank before it unless it repeats the previous token
+    can_skip = np.zeros(states, dtype=bool)
+    can_skip[2:] = (labels[2:] != blank_id) & (labels[2:] != labels[:-2])
+
+    relative = log_probs - log_probs.max(axis=1, keepdims=True)
+    emissions = relative[:, labels]
+
+    score = np.full(states, -np.inf)
+    start = np.zeros(states, dtype=int)
+    best = (-np.inf, 0, 0)
+
+    for frame, emission in enumerate(emissions):
+        # Candidate predecessors: stay, advance one, skip a blank
+        stay = score
+        advance = np.concatenate(([-np.inf], score[:-1]))
+        skip = np.where(can_skip, np.concatenate(([-np.inf, -np.inf], score[:-2])), -np.inf)
+
+        candidates = np.stack([stay, advance, skip])
+        choice = np.argmax(candidates, axis=0)
+        previous = candidates[choice, np.arange(states)]
+        start = np.stack([start, np.roll(start, 1), np.roll(start, 2)])[choice, np.arange(states)]
+
+        # The keyword may begin at any frame (leading blank or first token)
+        for state in (0, 1):
+            if previous[state] < 0:
+                previous[state] = 0.0
+                start[state] = frame
+
+        score = previous + emission
+
+        # The keyword may end at any frame (last token or trailing blank)
+        for state in (states - 2, states - 1):
+            if score[state] > best[0]:
+                best = (score[state], start[state], frame)
+
+    return best
+
+
+class KeywordMatch:
+    """A keyword detected in the audio stream"""
+
+    def __init__(self, keyword, confidence, start_time, end_time, transcript=None):
+        self.keyword = keyword
+        self.confidence = confidence
+        self.start_time = start_time
+        self.end_time = end_time
+        self.transcript = transcript
+
+    def __repr__(self):
+        return (f"KeywordMatch({self.keyword!r}, confidence={self.confidence:.2f}, "
+                f"{self.start_time:.2f}-{self.end_time:.2f})")
+
+
+class KeywordSpotter:
+    """
+    Keyword spotting mode for continuous recognition.
+
+    Each phrase is run through the Wav2Vec2 acoustic model once and the
+    keywords are scored against its CTC output; full transcription only
+    happens for phrases that contain a keyword. Use process as the
+    callback of AudioHandler.record_continuous.
+    """
+
+    def __init__(self, keywords, recognizer=None, full_recognizer=None,
+                 threshold=None, on_match=None, escalate=True):
+        """
+        Initialize the spotter.
+
+        Args:
+            keywords: Words or short phrases to detect
+            recognizer: Wav2Vec2 SpeechRecognizer used for scoring; defaults to
+                the keyword_spotting model in MODEL_CONFIG
+            full_recognizer: SpeechRecognizer used on a match; by default the
+                transcript is decoded from the CTC output already computed
+            threshold: Minimum confidence (0-1) for a match
+            on_match: Called with each KeywordMatch
+            escalate: Transcribe phrases that contain a match
+        """
+        config = MODEL_CONFIG['keyword_spotting']
+        self.logger = setup_logging()
+        self.recognizer = recognizer or SpeechRecognizer(
+            engine="wav2vec2",
+            model_name=config['model_name']
+        )
+        self.full_recognizer = full_recognizer
+        self.threshold = threshold if threshold is not None else config['threshold']
+        self.on_match = on_match
+        self.escalate = escalate
+
+        tokenizer = self.recognizer.tokenizer
+        self.blank_id = tokenizer.pad_token_id
+        self.keywords = {keyword: self._tokenize(tokenizer, keyword) for keyword in keywords}
+
+        self._lock = threading.Lock()
+        self._position = 0.0
+        self.phrases = 0
+        self.matches = 0
+        self.audio_seconds = 0.0
+        self.spot_seconds = 0.0
+        self.full_seconds = 0.0
+        self.full_audio_seconds = 0.0
+        self.full_transcriptions = 0
+
+    @staticmethod
+    def _tokenize(tokenizer, keyword):
+        """Convert a keyword to CTC token ids (words separated by the delimiter)"""
+        text = keyword.strip()
+        if tokenizer.do_lower_case:
+            text = text.lower()
+        else:
+            text = text.upper()
+        tokens = list(text.replace(" ", tokenizer.word_delimiter_token))
+
+        token_ids = tokenizer.convert_tokens_to_ids(tokens)
+        if not token_ids or tokenizer.unk_token_id in token_ids:
+            raise ValueError(f"Keyword '{keyword}' contains characters the model cannot spell")
+        return token_ids
+
+    def spot(self, log_probs, frame_seconds, offset=0.0):
+        """
+        Score every keyword against precomputed CTC log-probabilities.
+
+        Args:
+            log_probs: Output of SpeechRecognizer.compute_log_probs
+            frame_seconds: Duration of one output frame
+            offset: Stream time of the first frame in seconds
+
+        Returns:
+            List of KeywordMatch above the threshold, best first
+        """
+        matches = []
+        for keyword, token_ids in self.keywords.items():
+            score, start, end = ctc_keyword_score(log_probs, token_ids, self.blank_id)
+            confidence = float(np.exp(score / len(token_ids)))
+            if confidence >= self.threshold:
+                matches.append(KeywordMatch(
+                    keyword,
+                    confidence,
+                    offset + start * frame_seconds,
+                    offset + (end + 1) * frame_seconds
+                ))
+        return sorted(matches, key=lambda match: match.confidence, reverse=True)
+
+    def process(self, audio_data, offset=None):
+        """
+        Check one phrase for keywords.
+
+        Args:
+            audio_data: AudioData object
+            offset: Stream time of the phrase; defaults to the running total
+                of audio seen by this spotter
+
+        Returns:
+            List of KeywordMatch (empty if no keyword was spoken)
+        """
+        duration = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+        with self._lock:
+            if offset is None:
+                offset = self._position
+            self._position = offset + duration
+
+        # Process-wide CPU time: PyTorch runs inference on its intra-op
+        # threads, which thread_time() would not see. The delta is only an
+        # approximation of this call's cost, see stats().
+        started = time.process_time()
+        log_probs = self.recognizer.compute_log_probs(audio_data)
+        matches = self.spot(log_probs, self.recognizer.frame_seconds, offset)
+        spot_seconds = time.process_time() - started
+
+        full_seconds = 0.0
+        transcript = None
+        if matches and self.escalate:
+            started = time.process_time()
+            if self.full_recognizer is None:
+                transcript = self.recognizer.decode_log_probs(log_probs)
+            else:
+                transcript = self.full_recognizer.recognize(audio_data)
+            full_seconds = time.process_time() - started
+
+        for match in matches:
+            match.transcript = transcript
+
+        with self._lock:
+            self.phrases += 1
+            self.audio_seconds += duration
+            self.spot_seconds += spot_seconds
+            if matches:
+                self.matches += 1
+            if matches and self.escalate:
+                self.full_transcriptions += 1
+                self.full_seconds += full_seconds
+                self.full_audio_seconds += duration
+
+        for match in matches:
+            self.logger.info(f"Keyword spotted: {match}")
+            if self.on_match:
+                try:
+                    self.on_match(match)
+                except Exception as e:
+                    self.logger.error(f"Keyword callback error: {e}")
+
+        return matches
+
+    def stats(self, full_cost_per_second=None):
+        """
+        Summarize CPU use against always-on full transcription.
+
+        CPU seconds are approximate: each call adds the process-wide
+        (all threads) CPU time that passed during its inference, so work
+        running concurrently elsewhere in the process, including other
+        process() calls, is counted too. For the spotter's own cost, measure
+        with nothing else running in the process.
+
+        Args:
+            full_cost_per_second: CPU seconds a full transcription costs per
+                audio second; measured from escalations when omitted
+
+        Returns:
+            Dict with phrase, match and full-transcription counts, CPU
+            seconds spent, the estimated always-on cost and the fraction
+            saved (None until a full-transcription cost is known)
+        """
+        with self._lock:
+            spent = self.spot_seconds + self.full_seconds
+            if full_cost_per_second is None and self.full_audio_seconds > 0:
+                full_cost_per_second = self.full_seconds / self.full_audio_seconds
+
+            always_on = None
+            saved = None
+            if full_cost_per_second is not None:
+                # With the default decoder a full transcription also needs the
+                # acoustic model, so charge it alongside the decode cost
+                if self.full_recognizer is None and self.audio_seconds > 0:
+                    full_cost_per_second += self.spot_seconds / self.audio_seconds
+                always_on = full_cost_per_second * self.audio_seconds
+                saved = 1 - spent / always_on if always_on > 0 else None
+
+            return {
+                'phrases': self.phrases,
+                'matches': self.matches,
+                'full_transcriptions': self.full_transcriptions,
+                'full_transcriptions_avoided': self.phrases - self.full_transcriptions,
+                'audio_seconds': self.audio_seconds,
+                'cpu_seconds': spent,
+                'always_on_cpu_seconds': always_on,
+                'cpu_saved_fraction': saved
+            }
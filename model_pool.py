@@ -0,0 +1,184 @@
+"""
+Model Pool
+Keeps recently used models resident with LRU eviction under a memory budget
+"""
+
+import threading
+from collections import OrderedDict
+from config import MODEL_CONFIG
+from utils import setup_logging
+
+
+def estimate_model_bytes(value):
+    """
+    Estimate the memory held by a model or a tuple containing models.
+
+    Args:
+        value: Object with parameters()/buffers() (torch module) or a tuple of them
+
+    Returns:
+        Size in bytes (0 for objects without tensors)
+    """
+    items = value if isinstance(value, (tuple, list)) else (value,)
+    total = 0
+    for item in items:
+        if hasattr(item, "parameters"):
+            total += sum(p.numel() * p.element_size() for p in item.parameters())
+        if hasattr(item, "buffers"):
+            total += sum(b.numel() * b.element_size() for b in item.buffers())
+    return total
+
+
+class ModelPool:
+    """
+    Thread-safe LRU cache of loaded models.
+
+    Pinned models (e.g. the language-ID model consulted on every
+    auto-language request) are never evicted to make room for the models
+    chosen after them. They still count against the budget, so the
+    evictable models share what the pinned ones leave.
+    """
+
+    def __init__(self, memory_budget_mb=None, max_models=None, size_fn=estimate_model_bytes):
+        """
+        Initialize the pool.
+
+        Args:
+            memory_budget_mb: Total size the resident models may use
+            max_models: Maximum number of resident models
+            size_fn: Returns the size in bytes of a loaded value
+        """
+        config = MODEL_CONFIG['pool']
+        budget = memory_budget_mb if memory_budget_mb is not None else config['memory_budget_mb']
+        self.budget_bytes = int(budget * 1024 * 1024)
+        self.max_models = max_models or config['max_models']
+        self.size_fn = size_fn
+        self.logger = setup_logging()
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, size), least recently used first
+        self._pinned = {}  # key -> (value, size), never evicted by _make_room
+        self._loading = {}  # key -> Event set when a concurrent load finishes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def resident_bytes(self):
+        """Total estimated size of the evictable models"""
+        with self._lock:
+            return sum(size for _, size in self._entries.values())
+
+    @property
+    def pinned_bytes(self):
+        """Total estimated size of pinned models"""
+        with self._lock:
+            return sum(size for _, size in self._pinned.values())
+
+    def keys(self):
+        """Evictable resident keys, least recently used first"""
+        with self._lock:
+            return list(self._entries)
+
+    def pinned_keys(self):
+        """Keys of pinned models"""
+        with self._lock:
+            return list(self._pinned)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries or key in self._pinned
+
+    def get(self, key, loader, pinned=False):
+        """
+        Return a resident model, loading it on a miss.
+
+        Concurrent requests for the same key wait for a single load.
+
+        Args:
+            key: Model identifier
+            loader: Called with key to load the model on a miss
+            pinned: Keep the model resident outside the LRU order
+
+        Returns:
+            The loaded value
+        """
+        while True:
+            with self._lock:
+                if key in self._pinned:
+                    self.hits += 1
+                    return self._pinned[key][0]
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key][0]
+
+                pending = self._loading.get(key)
+                if pending is None:
+                    self._loading[key] = threading.Event()
+                    self.misses += 1
+                    break
+
+            # Another thread is loading this key; use its result
+            pending.wait()
+
+        try:
+            self.logger.info(f"Loading model into pool: {key}")
+            value = loader(key)
+            size = self.size_fn(value)
+            with self._lock:
+                self._make_room(size, pinned)
+                if pinned:
+                    self._pinned[key] = (value, size)
+                else:
+                    self._entries[key] = (value, size)
+            self.logger.info(f"Model {key} resident ({size / 1024 / 1024:.0f} MB{', pinned' if pinned else ''})")
+            return value
+        finally:
+            with self._lock:
+                self._loading.pop(key).set()
+
+    def _make_room(self, size, pinned=False):
+        """Evict least recently used models until size fits beside the pinned ones (lock held)"""
+        pinned_bytes = sum(entry_size for _, entry_size in self._pinned.values())
+        available = self.budget_bytes - pinned_bytes
+        used = sum(entry_size for _, entry_size in self._entries.values())
+        while self._entries and (
+            used + size > available or (not pinned and len(self._entries) >= self.max_models)
+        ):
+            key, (_, evicted_size) = self._entries.popitem(last=False)
+            used -= evicted_size
+            self.evictions += 1
+            self.logger.info(f"Evicted model from pool: {key}")
+
+        if size > available:
+            self.logger.warning(
+                f"Model needs {size / 1024 / 1024:.0f} MB beside "
+                f"{pinned_bytes / 1024 / 1024:.0f} MB of pinned models, over the "
+                f"{self.budget_bytes / 1024 / 1024:.0f} MB pool budget"
+            )
+
+    def evict(self, key):
+        """Drop a model from the pool"""
+        with self._lock:
+            if self._entries.pop(key, None) is not None or self._pinned.pop(key, None) is not None:
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every resident model, pinned ones included"""
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_model_pool():
+    """Return the process-wide model pool shared by all recognizers"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ModelPool()
+        return _shared_pool
@@ -0,0 +1,116 @@
+"""
+Noise Profile Store
+Persists per-microphone energy thresholds so recordings can skip calibration
+"""
+
+import json
+import os
+import threading
+from config import PERFORMANCE, get_path
+from utils import setup_logging
+
+
+class NoiseProfileStore:
+    """Energy thresholds keyed by microphone name, stored as JSON"""
+
+    def __init__(self, file_path=None, smoothing=None):
+        """
+        Initialize the store.
+
+        Args:
+            file_path: JSON file holding the profiles
+            smoothing: Weight of a new measurement in the moving average (0-1)
+        """
+        self.file_path = file_path or get_path('noise_profile_file')
+        self.smoothing = smoothing if smoothing is not None else PERFORMANCE['noise_profile_smoothing']
+        self.logger = setup_logging()
+        self._lock = threading.Lock()
+        self._profiles = None
+
+    def _load(self):
+        """Read profiles from disk on first access"""
+        if self._profiles is not None:
+            return
+
+        self._profiles = {}
+        if not os.path.exists(self.file_path):
+            return
+
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                self._profiles = {name: float(value) for name, value in json.load(f).items()}
+        except (OSError, ValueError, AttributeError) as e:
+            self.logger.warning(f"Ignoring unreadable noise profiles {self.file_path}: {e}")
+
+    def _save(self):
+        """Write profiles to disk atomically"""
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temp_path = f"{self.file_path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._profiles, f, indent=2)
+            os.replace(temp_path, self.file_path)
+        except OSError as e:
+            self.logger.warning(f"Could not save noise profiles: {e}")
+
+    def get(self, device_name):
+        """
+        Return the stored energy threshold for a device.
+
+        Args:
+            device_name: Microphone name
+
+        Returns:
+            Energy threshold, or None if the device was never calibrated
+        """
+        with self._lock:
+            self._load()
+            return self._profiles.get(device_name)
+
+    def set(self, device_name, energy_threshold):
+        """
+        Replace a device's energy threshold with a fresh measurement.
+
+        Args:
+            device_name: Microphone name
+            energy_threshold: Measured energy threshold
+        """
+        with self._lock:
+            self._load()
+            self._profiles[device_name] = float(energy_threshold)
+            self._save()
+
+    def update(self, device_name, energy_threshold):
+        """
+        Blend a new observation into a device's profile.
+
+        Args:
+            device_name: Microphone name
+            energy_threshold: Threshold observed during the last recording
+
+        Returns:
+            The updated energy threshold
+        """
+        with self._lock:
+            self._load()
+            previous = self._profiles.get(device_name)
+            if previous is None:
+                value = float(energy_threshold)
+            else:
+                value = (1 - self.smoothing) * previous + self.smoothing * energy_threshold
+
+            # Skip the disk write when nothing meaningful changed
+            if previous is None or abs(value - previous) > 1e-6 * max(previous, 1.0):
+                self._profiles[device_name] = value
+                self._save()
+            return value
+
+    def remove(self, device_name):
+        """Forget a device's profile so it is calibrated again"""
+        with self._lock:
+            self._load()
+            if self._profiles.pop(device_name, None) is not None:
+                self._save()
@@ -3,27 +3,38 @@ Speech Recognition Engine Handler
 Supports Google, Sphinx, and Wav2Vec2 recognition
 """
 
+import socket
+import numpy as np
 import speech_recognition as sr
 import torch
-from transformers import Wav2Vec2Tokenizer, Wav2Vec2ForCTC
-from config import ENGINE_CONFIG, MODEL_CONFIG
+from transformers import (
+    AutoFeatureExtractor,
+    Wav2Vec2CTCTokenizer,
+    Wav2Vec2ForCTC,
+    Wav2Vec2ForSequenceClassification
+)
+from config import ENGINE_CONFIG, MODEL_CONFIG, PERFORMANCE
+from errors import RecognitionError, NoSpeechError, EngineUnavailableError, EngineTimeoutError
+from model_pool import get_model_pool
 from utils import setup_logging
 
 
 class SpeechRecognizer:
     """Speech Recognizer supporting multiple engines"""
 
-    def __init__(self, engine="google", language="en-US"):
+    def __init__(self, engine="google", language="en-US", model_name=None):
         """
         Initialize the recognizer.
 
         Args:
             engine (str): Recognition engine: google, sphinx, wav2vec2
-            language (str): Language code
+            language (str): Language code; None or "auto" lets wav2vec2
+                identify the language of each request
+            model_name (str): Wav2Vec2 checkpoint overriding MODEL_CONFIG
         """
 
         self.engine = engine.lower()
-        self.language = language
+        self.model_name = model_name
         self.logger = setup_logging()
         self.recognizer = sr.Recognizer()
 
@@ -31,18 +42,39 @@ class SpeechRecognizer:
             self.logger.error(f"Invalid engine selected: {self.engine}")
             raise ValueError(f"Unsupported engine '{self.engine}'")
 
+        self.language = self._resolve_language(language)
+
         # Load Wav2Vec2 only when required
         if self.engine == "wav2vec2":
             self._load_wav2vec2_model()
 
+    def _resolve_language(self, language):
+        """Validate a language code against ENGINE_CONFIG and normalize it"""
+
+        config = ENGINE_CONFIG[self.engine]
+
+        if language in (None, "auto"):
+            return None if self.engine == "wav2vec2" else config["default_language"]
+
+        # Offline models are per base language (en-US -> en)
+        code = language.split("-")[0].lower() if self.engine == "wav2vec2" else language
+
+        # An explicit checkpoint is trusted to match the requested language
+        if code not in config["languages"] and not self.model_name:
+            self.logger.error(f"Language {language} not supported by {self.engine}")
+            raise ValueError(
+                f"Engine '{self.engine}' does not support language '{language}' "
+                f"(supported: {', '.join(config['languages'])})"
+            )
+        return code
+
     # -----------------------------------------------------------------------------------------------------------
     # Wav2Vec2 Model Loader
     # -----------------------------------------------------------------------------------------------------------
     def _load_wav2vec2_model(self):
-        """Load Wav2Vec2 model (offline engine)"""
+        """Load Wav2Vec2 model (offline engine) into the shared model pool"""
 
         config = MODEL_CONFIG["wav2vec2"]
-        model_name = config["model_name"]
 
         # Select device automatically
         if config["device"] == "auto":
@@ -54,14 +86,11 @@ class SpeechRecognizer:
         self.logger.info(f"Loading Wav2Vec2 model on {self.device}...")
 
         try:
-            self.tokenizer = Wav2Vec2Tokenizer.from_pretrained(
-                model_name,
-                cache_dir=config["cache_dir"]
-            )
-            self.model = Wav2Vec2ForCTC.from_pretrained(
-                model_name,
-                cache_dir=config["cache_dir"]
-            ).to(self.device)
+            if self.language is None:
+                if MODEL_CONFIG["language_id"]["enabled"]:
+                    self._lid_resources()
+            else:
+                self._ctc_resources(self.language)
 
             self.logger.info("Wav2Vec2 model loaded successfully!")
 
@@ -69,36 +98,247 @@ class SpeechRecognizer:
             self.logger.error(f"Error loading Wav2Vec2 model: {e}")
             raise
 
+    def _model_name_for(self, language):
+        """Wav2Vec2 checkpoint used for a base language code"""
+
+        config = MODEL_CONFIG["wav2vec2"]
+        return self.model_name or config["language_models"].get(language, config["model_name"])
+
+    def _ctc_resources(self, language):
+        """Return (model, tokenizer, feature_extractor) for a language from the model pool"""
+
+        model_name = self._model_name_for(language)
+        cache_dir = MODEL_CONFIG["wav2vec2"]["cache_dir"]
+
+        def load(key):
+            tokenizer = Wav2Vec2CTCTokenizer.from_pretrained(model_name, cache_dir=cache_dir)
+            # Per-checkpoint input normalization and attention-mask settings
+            extractor = AutoFeatureExtractor.from_pretrained(model_name, cache_dir=cache_dir)
+            model = Wav2Vec2ForCTC.from_pretrained(model_name, cache_dir=cache_dir)
+            return model.to(self.device).eval(), tokenizer, extractor
+
+        return get_model_pool().get(f"{model_name}@{self.device}", load)
+
+    def _lid_resources(self):
+        """Return (model, feature_extractor) for language identification"""
+
+        model_name = MODEL_CONFIG["language_id"]["model_name"]
+        cache_dir = MODEL_CONFIG["wav2vec2"]["cache_dir"]
+
+        def load(key):
+            extractor = AutoFeatureExtractor.from_pretrained(model_name, cache_dir=cache_dir)
+            model = Wav2Vec2ForSequenceClassification.from_pretrained(model_name, cache_dir=cache_dir)
+            return model.to(self.device).eval(), extractor
+
+        # Consulted on every auto-language request, so it must not compete
+        # with the per-language models for the LRU budget
+        return get_model_pool().get(
+            f"{model_name}@{self.device}", load, pinned=MODEL_CONFIG["language_id"]["pinned"]
+        )
+
+    @property
+    def model(self):
+        """Wav2Vec2 CTC model for the configured language"""
+
+        return self._ctc_resources(self._default_language())[0]
+
+    @property
+    def tokenizer(self):
+        """Tokenizer matching model"""
+
+        return self._ctc_resources(self._default_language())[1]
+
+    def _default_language(self):
+        """Configured language, or the fallback when identifying per request"""
+
+        return self.language or MODEL_CONFIG["language_id"]["fallback_language"]
+
+    def identify_language(self, audio_data):
+        """
+        Identify the spoken language with a fast pre-pass on the first seconds.
+
+        Args:
+            audio_data: AudioData object
+
+        Returns:
+            Base language code supported by wav2vec2 (the fallback language
+            when identification is disabled or unsupported)
+        """
+
+        config = MODEL_CONFIG["language_id"]
+        if not config["enabled"]:
+            return config["fallback_language"]
+
+        model, extractor = self._lid_resources()
+        waveform = self._audio_to_waveform(audio_data)[:int(config["max_seconds"] * 16000)]
+        inputs = extractor(waveform, sampling_rate=16000, return_tensors="pt").to(self.device)
+
+        with torch.no_grad():
+            logits = model(**inputs).logits[0]
+
+        label = model.config.id2label[int(torch.argmax(logits))]
+        language = config["labels"].get(label)
+
+        if language not in ENGINE_CONFIG["wav2vec2"]["languages"]:
+            self.logger.warning(
+                f"Identified language '{label}' has no offline model; "
+                f"using {config['fallback_language']}"
+            )
+            return config["fallback_language"]
+
+        self.logger.info(f"Identified language: {language}")
+        return language
+
+    def _language_for(self, audio_data):
+        """Configured language, or the identified one when none was given"""
+
+        return self.language or self.identify_language(audio_data)
+
     # --------------------------------------------------------------------------------------------------
     # Main Recognition Function
     # --------------------------------------------------------------------------------------------------
     def recognize(self, audio_data):
         """
         Recognize speech from audio_data (AudioData object)
+
+        Returns:
+            Transcription, or None on any failure (see transcribe for
+            structured errors)
+        """
+
+        try:
+            return self.transcribe(audio_data)
+
+        except Exception as e:
+            self.logger.error(f"Recognition error: {e}")
+            return None
+
+    def transcribe(self, audio_data, timeout=None):
+        """
+        Recognize speech, raising structured errors instead of returning None.
+
+        Args:
+            audio_data: AudioData object
+            timeout: Seconds to wait for online engines (None for no limit)
+
+        Returns:
+            Non-empty transcription
+
+        Raises:
+            NoSpeechError: No intelligible speech in the audio
+            EngineUnavailableError: The engine could not run
+            EngineTimeoutError: The online engine did not answer in time
+            RecognitionError: Any other engine failure
         """
 
         try:
             if self.engine == "google":
-                return self._recognize_google(audio_data)
+                text = self._recognize_google(audio_data, timeout)
 
             elif self.engine == "sphinx":
-                return self._recognize_sphinx(audio_data)
+                text = self._recognize_sphinx(audio_data)
 
-            elif self.engine == "wav2vec2":
-                return self._recognize_wav2vec2(audio_data)
+            else:
+                text = self._recognize_wav2vec2(audio_data)
 
+        except RecognitionError:
+            raise
+        except sr.UnknownValueError:
+            raise NoSpeechError("Speech was unintelligible", self.engine)
+        except socket.timeout as e:
+            raise EngineTimeoutError("Request timed out", self.engine) from e
+        except sr.RequestError as e:
+            # URLError timeouts surface as "recognition connection failed: timed out"
+            if "timed out" in str(e):
+                raise EngineTimeoutError(str(e), self.engine) from e
+            raise EngineUnavailableError(str(e), self.engine) from e
         except Exception as e:
-            self.logger.error(f"Recognition error: {e}")
-            return None
+            raise RecognitionError(str(e), self.engine) from e
+
+        if not text or not text.strip():
+            raise NoSpeechError("No speech recognized", self.engine)
+        return text
+
+    def recognize_chunked(self, audio_data, chunk_seconds=None,
+                          progress_callback=None, cancel_event=None):
+        """
+        Recognize long audio in fixed-size chunks.
+
+        Args:
+            audio_data: AudioData object
+            chunk_seconds: Seconds of audio per recognition call
+            progress_callback: Called with the completed fraction after each chunk
+            cancel_event: threading.Event that stops processing when set
+
+        Returns:
+            Joined transcription, or None if nothing was recognized or cancelled
+        """
+
+        return self._recognize_chunks(self.recognize, audio_data, chunk_seconds,
+                                      progress_callback, cancel_event)
+
+    def _recognize_chunks(self, recognize, audio_data, chunk_seconds,
+                          progress_callback, cancel_event):
+        """Run recognize on consecutive chunks and join the results"""
+
+        chunk_seconds = chunk_seconds or PERFORMANCE["chunk_seconds"]
+        bytes_per_second = audio_data.sample_rate * audio_data.sample_width
+        total_ms = int(len(audio_data.frame_data) * 1000 / bytes_per_second)
+        chunk_ms = int(chunk_seconds * 1000)
+
+        starts = list(range(0, max(total_ms, 1), chunk_ms))
+        texts = []
+
+        for index, start in enumerate(starts):
+            if cancel_event is not None and cancel_event.is_set():
+                self.logger.info("Chunked recognition cancelled")
+                return None
+
+            segment = audio_data.get_segment(start, min(start + chunk_ms, total_ms))
+            text = recognize(segment)
+            if text:
+                texts.append(text)
+
+            if progress_callback:
+                progress_callback((index + 1) / len(starts))
+
+        return " ".join(texts) if texts else None
+
+    def recognize_batch(self, audio_list):
+        """
+        Recognize several independent clips.
+
+        Wav2Vec2 runs the whole batch through the model in one forward pass;
+        the other engines recognize the clips one after another.
+
+        Args:
+            audio_list: List of AudioData objects
+
+        Returns:
+            List of transcriptions (None where recognition failed)
+        """
+
+        if not audio_list:
+            return []
+
+        if self.engine != "wav2vec2":
+            return [self.recognize(audio_data) for audio_data in audio_list]
+
+        try:
+            return self._recognize_wav2vec2_batch(audio_list)
+        except Exception as e:
+            self.logger.error(f"Batch recognition error: {e}")
+            return [None] * len(audio_list)
 
     # ------------------------------------------------------------------------------------
     # Google Speech Recognition
     # ------------------------------------------------------------------------------------
-    def _recognize_google(self, audio_data):
+    def _recognize_google(self, audio_data, timeout=None):
         """Recognize using Google Web Speech API"""
 
         self.logger.info("Using Google Speech Recognition...")
 
+        self.recognizer.operation_timeout = timeout
         return self.recognizer.recognize_google(audio_data, language=self.language)
 
     # ------------------------------------------------------------------------------------
@@ -111,8 +351,11 @@ class SpeechRecognizer:
 
         try:
             return self.recognizer.recognize_sphinx(audio_data, language=self.language)
-        except Exception:
-            return "Sphinx engine unavailable — install pocketsphinx"
+        except sr.RequestError as e:
+            raise EngineUnavailableError(
+                f"Sphinx engine unavailable — install pocketsphinx ({e})",
+                self.engine
+            ) from e
 
     # ------------------------------------------------------------------------------------
     # Wav2Vec2 Speech Recognition (Offline)
@@ -122,23 +365,104 @@ class SpeechRecognizer:
 
         self.logger.info("Running inference with Wav2Vec2...")
 
-        # Convert audio bytes to tensor
-        wav_bytes = audio_data.get_wav_data()
-        waveform = torch.tensor(
-            list(wav_bytes),
-            dtype=torch.float32
-        ).to(self.device)
+        model, tokenizer, extractor = self._ctc_resources(self._language_for(audio_data))
+        return self._decode(tokenizer, self._log_probs(model, extractor, audio_data))
 
-        # Normalize and reshape
-        waveform = waveform / 32768.0
-        waveform = waveform.unsqueeze(0)
+    def compute_log_probs(self, audio_data):
+        """
+        Run the Wav2Vec2 acoustic model without decoding.
 
-        # Tokenize and run inference
-        logits = self.model(waveform).logits
-        predicted_ids = torch.argmax(logits, dim=-1)
+        Args:
+            audio_data: AudioData object
 
-        # Decode transcription
-        transcription = self.tokenizer.decode(predicted_ids[0])
+        Returns:
+            NumPy array of per-frame CTC log-probabilities, shape (frames, vocab)
+        """
+
+        if self.engine != "wav2vec2":
+            raise ValueError(f"Engine '{self.engine}' does not expose CTC log-probabilities")
+
+        model, _, extractor = self._ctc_resources(self._default_language())
+        return self._log_probs(model, extractor, audio_data)
+
+    def decode_log_probs(self, log_probs):
+        """Greedy CTC decoding of compute_log_probs output"""
+
+        return self._decode(self.tokenizer, log_probs)
+
+    def _log_probs(self, model, extractor, audio_data):
+        """Run a CTC model on one clip and return its log-probabilities"""
+
+        # Normalize the waveform the way the checkpoint was trained
+        inputs = extractor(self._audio_to_waveform(audio_data), sampling_rate=16000, return_tensors="pt")
+
+        with torch.no_grad():
+            logits = model(**inputs.to(self.device)).logits
+
+        return torch.log_softmax(logits[0], dim=-1).cpu().numpy()
+
+    @staticmethod
+    def _decode(tokenizer, log_probs):
+        """Greedy CTC decoding"""
+
+        predicted_ids = np.argmax(log_probs, axis=-1)
+        transcription = tokenizer.decode(predicted_ids.tolist())
 
         return transcription.replace("|", " ").strip()
 
+    @property
+    def frame_seconds(self):
+        """Duration of one Wav2Vec2 output frame in seconds"""
+
+        return self.model.config.inputs_to_logits_ratio / 16000
+
+    def _recognize_wav2vec2_batch(self, audio_list):
+        """Recognize several clips, one zero-padded forward pass per language"""
+
+        self.logger.info(f"Running batched inference with Wav2Vec2 ({len(audio_list)} clips)...")
+
+        languages = [self._language_for(audio_data) for audio_data in audio_list]
+        transcriptions = [None] * len(audio_list)
+
+        for language in set(languages):
+            rows = [row for row, clip_language in enumerate(languages) if clip_language == language]
+            model, tokenizer, extractor = self._ctc_resources(language)
+            texts = self._forward_batch(model, tokenizer, extractor, [audio_list[row] for row in rows])
+            for row, text in zip(rows, texts):
+                transcriptions[row] = text
+
+        return transcriptions
+
+    def _forward_batch(self, model, tokenizer, extractor, audio_list):
+        """Run one padded forward pass and decode each clip"""
+
+        waveforms = [self._audio_to_waveform(audio_data) for audio_data in audio_list]
+        lengths = [len(waveform) for waveform in waveforms]
+
+        # The extractor normalizes each clip over its own samples and returns
+        # an attention mask when the checkpoint needs one (layer-norm feature
+        # extraction, e.g. the xlsr-53 models); group-norm checkpoints take
+        # plain zero padding
+        inputs = extractor(waveforms, sampling_rate=16000, padding=True, return_tensors="pt")
+
+        with torch.no_grad():
+            logits = model(**inputs.to(self.device)).logits
+
+        # Ignore frames that only cover padding
+        frame_counts = model._get_feat_extract_output_lengths(torch.tensor(lengths))
+        predicted_ids = torch.argmax(logits, dim=-1)
+
+        transcriptions = []
+        for row, frames in enumerate(frame_counts.tolist()):
+            text = tokenizer.decode(predicted_ids[row, :frames])
+            transcriptions.append(text.replace("|", " ").strip() or None)
+
+        return transcriptions
+
+    @staticmethod
+    def _audio_to_waveform(audio_data):
+        """Convert AudioData to a 16 kHz float32 waveform in [-1, 1]"""
+
+        raw_data = audio_data.get_raw_data(convert_rate=16000, convert_width=2)
+        return np.frombuffer(raw_data, dtype="<i2").astype(np.float32) / 32768.0
+
@@ -5,10 +5,56 @@ Unit Tests for Speech Recognition System
 import unittest
 import os
 import tempfile
+import threading
+import time
+import json
+import logging
+import multiprocessing
+import subprocess
+import sys
+from unittest import mock
+
+import numpy as np
+import speech_recognition as sr
+import torch
+from transformers import (
+    Wav2Vec2Config, Wav2Vec2CTCTokenizer, Wav2Vec2FeatureExtractor, Wav2Vec2ForCTC
+)
+
+import config
+from config import MODEL_CONFIG, Settings
 from speech_recognizer import SpeechRecognizer
 from audio_handler import AudioHandler
+from audio_sources import AudioSource, FileReplaySource, SyntheticSource
+from capture_manager import CaptureManager, deinterleave
+from diarization import Diarizer
+from engine_router import EngineRouter, LatencyHistogram
+from errors import AllEnginesFailedError, EngineUnavailableError, NoSpeechError
+from job_queue import JobExecutor, Job, ThroughputStats
+from keyword_spotter import KeywordSpotter, ctc_keyword_score
+from model_pool import ModelPool
+from noise_profile import NoiseProfileStore
+from transcript_store import TranscriptStore
 from utils import setup_logging, save_transcription, format_timestamp
 
+_test_log_dir = None
+
+def use_test_log_file():
+    """Send the SpeechToText log to a temporary file instead of ./logs"""
+    config.override({'PATHS': {'log_file': os.path.join(_test_log_dir.name, 'speech_recognition.log')}})
+    
+def setUpModule():
+    """Keep test runs from writing into the working tree"""
+    global _test_log_dir
+    _test_log_dir = tempfile.TemporaryDirectory()
+    use_test_log_file()
+    
+def tearDownModule():
+    """Close the test log and remove it"""
+    for handler in logging.getLogger('SpeechToText').handlers:
+        handler.close()
+    _test_log_dir.cleanup()
+    
 class TestSpeechRecognizer(unittest.TestCase):
     """Test cases for SpeechRecognizer class"""
     
@@ -35,6 +81,199 @@ class TestSpeechRecognizer(unittest.TestCase):
         # Should raise error when recognizing
         # This is tested during actual recognition
         
+    def test_unsupported_language(self):
+        """Test languages outside ENGINE_CONFIG are rejected"""
+        with self.assertRaises(ValueError):
+            SpeechRecognizer(engine='sphinx', language='ja-JP')
+        with mock.patch.object(SpeechRecognizer, '_load_wav2vec2_model'):
+            with self.assertRaises(ValueError):
+                SpeechRecognizer(engine='wav2vec2', language='xx-XX')
+                
+    def test_wav2vec2_language_routing(self):
+        """Test wav2vec2 maps region codes to per-language models"""
+        with mock.patch.object(SpeechRecognizer, '_load_wav2vec2_model'):
+            recognizer = SpeechRecognizer(engine='wav2vec2', language='fr-FR')
+            
+        self.assertEqual(recognizer.language, 'fr')
+        self.assertIn('french', recognizer._model_name_for(recognizer.language))
+        
+    def test_wav2vec2_auto_language(self):
+        """Test requests without a language go through language identification"""
+        audio = sr.AudioData(b"\x00\x00" * 1600, 16000, 2)
+        with mock.patch.object(SpeechRecognizer, '_load_wav2vec2_model'):
+            recognizer = SpeechRecognizer(engine='wav2vec2', language=None)
+            
+        with mock.patch.object(recognizer, 'identify_language', return_value='de') as identify:
+            self.assertEqual(recognizer._language_for(audio), 'de')
+        identify.assert_called_once_with(audio)
+        
+    def test_wav2vec2_batch_matches_single_clips(self):
+        """Test padded batches decode like single clips on a layer-norm checkpoint"""
+        torch.manual_seed(0)
+        model_config = Wav2Vec2Config(
+            vocab_size=8, hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+            intermediate_size=37, conv_dim=(16, 16), conv_stride=(5, 4), conv_kernel=(10, 4),
+            num_conv_pos_embeddings=16, num_conv_pos_embedding_groups=2,
+            feat_extract_norm="layer", do_stable_layer_norm=True
+        )
+        model = Wav2Vec2ForCTC(model_config).eval()
+        extractor = Wav2Vec2FeatureExtractor(do_normalize=True, return_attention_mask=True)
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            vocab_file = os.path.join(temp_dir, 'vocab.json')
+            with open(vocab_file, 'w') as f:
+                json.dump(TestKeywordSpotter.VOCAB, f)
+            tokenizer = Wav2Vec2CTCTokenizer(vocab_file)
+            
+        rng = np.random.default_rng(0)
+        clips = [
+            sr.AudioData((rng.normal(0, 3000, int(seconds * 16000))).astype(np.int16).tobytes(), 16000, 2)
+            for seconds in (0.4, 1.0, 0.7)
+        ]
+        
+        with mock.patch.object(SpeechRecognizer, '_ctc_resources', return_value=(model, tokenizer, extractor)):
+            recognizer = SpeechRecognizer(engine='wav2vec2', language='fr')
+            single = [recognizer._recognize_wav2vec2(clip) or None for clip in clips]
+            batched = recognizer.recognize_batch(clips)
+            
+        self.assertTrue(any(single))
+        self.assertEqual(batched, single)
+        
+    def test_sphinx_unavailable_raises(self):
+        """Test a missing Sphinx install raises instead of returning a fake transcript"""
+        recognizer = SpeechRecognizer(engine='sphinx')
+        audio = sr.AudioData(b"\x00\x00" * 1600, 16000, 2)
+        error = sr.RequestError("missing PocketSphinx module")
+        
+        with mock.patch.object(recognizer.recognizer, 'recognize_sphinx', side_effect=error):
+            with self.assertRaises(EngineUnavailableError):
+                recognizer.transcribe(audio)
+            self.assertIsNone(recognizer.recognize(audio))
+            
+    def test_unintelligible_audio_raises(self):
+        """Test unintelligible audio maps to NoSpeechError"""
+        audio = sr.AudioData(b"\x00\x00" * 1600, 16000, 2)
+        
+        with mock.patch.object(self.recognizer.recognizer, 'recognize_google',
+                               side_effect=sr.UnknownValueError()):
+            with self.assertRaises(NoSpeechError):
+                self.recognizer.transcribe(audio)
+                
+    def test_recognize_chunked_progress(self):
+        """Test chunked recognition reports progress per chunk"""
+        audio = sr.AudioData(b"\x00\x00" * 16000 * 5, 16000, 2)
+        progress = []
+        
+        with mock.patch.object(self.recognizer, 'recognize', return_value="hello"):
+            text = self.recognizer.recognize_chunked(
+                audio, chunk_seconds=2, progress_callback=progress.append
+            )
+            
+        self.assertEqual(text, "hello hello hello")
+        self.assertEqual(len(progress), 3)
+        self.assertAlmostEqual(progress[-1], 1.0)
+        
+    def test_recognize_chunked_cancel(self):
+        """Test chunked recognition stops when cancelled"""
+        audio = sr.AudioData(b"\x00\x00" * 16000, 16000, 2)
+        cancel_event = threading.Event()
+        cancel_event.set()
+        
+        with mock.patch.object(self.recognizer, 'recognize', return_value="hello") as rec:
+            self.assertIsNone(self.recognizer.recognize_chunked(audio, cancel_event=cancel_event))
+            rec.assert_not_called()
+        
+class TestJobExecutor(unittest.TestCase):
+    """Test cases for the background job executor"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.executor = JobExecutor()
+        
+    def tearDown(self):
+        """Stop the executor"""
+        self.executor.shutdown(wait=True)
+        
+    def _wait(self, job):
+        """Block until job finishes"""
+        done = threading.Event()
+        job.on_done = lambda finished: done.set()
+        if not job.finished:
+            done.wait(5)
+        
+    def test_job_result_and_progress(self):
+        """Test jobs run in the background and report progress"""
+        progress = []
+        
+        def work(job, value):
+            job.report_progress(0.5)
+            return value * 2
+            
+        job = self.executor.submit(
+            work, 21, on_progress=lambda j, fraction: progress.append(fraction)
+        )
+        self._wait(job)
+        
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.result, 42)
+        self.assertEqual(progress, [0.5])
+        
+    def test_job_failure(self):
+        """Test exceptions are recorded on the job"""
+        def work(job):
+            raise RuntimeError("boom")
+            
+        job = self.executor.submit(work)
+        self._wait(job)
+        
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIsInstance(job.error, RuntimeError)
+        
+    def test_cancel_pending_job(self):
+        """Test queued jobs can be cancelled before they start"""
+        release = threading.Event()
+        blocker = self.executor.submit(lambda job: release.wait(5))
+        pending = self.executor.submit(lambda job: "ran")
+        
+        self.assertTrue(self.executor.cancel(pending.id))
+        release.set()
+        self._wait(blocker)
+        self._wait(pending)
+        
+        self.assertEqual(pending.status, Job.CANCELLED)
+        self.assertIsNone(pending.result)
+        
+    def test_concurrent_jobs(self):
+        """Test jobs run in parallel up to max_workers"""
+        self.executor.set_max_workers(3)
+        barrier = threading.Barrier(3, timeout=5)
+        jobs = [self.executor.submit(lambda job: barrier.wait()) for _ in range(3)]
+        for job in jobs:
+            self._wait(job)
+            
+        self.assertTrue(all(job.status == Job.DONE for job in jobs))
+        self.assertEqual(self.executor.max_workers, 3)
+        
+    def test_throughput_stats(self):
+        """Test audio seconds are aggregated from finished jobs"""
+        def work(job):
+            job.audio_seconds = 10.0
+            time.sleep(0.05)
+            
+        jobs = [self.executor.submit(work) for _ in range(2)]
+        for job in jobs:
+            self._wait(job)
+            
+        stats = self.executor.stats
+        self.assertEqual(stats.completed, 2)
+        self.assertEqual(stats.audio_seconds, 20.0)
+        self.assertGreater(stats.realtime_factor, 0)
+        self.assertIsNotNone(stats.eta(1))
+        
+    def test_eta_unknown_before_completion(self):
+        """Test ETA is undefined until a job has completed"""
+        self.assertIsNone(ThroughputStats().eta(5))
+        
 class TestAudioHandler(unittest.TestCase):
     """Test cases for AudioHandler class"""
     
@@ -47,12 +286,941 @@ class TestAudioHandler(unittest.TestCase):
         self.assertIsNotNone(self.handler)
         self.assertIsNotNone(self.handler.recognizer)
         
+    def test_cached_noise_profile_skips_calibration(self):
+        """Test recordings reuse a stored noise profile instead of calibrating"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = NoiseProfileStore(os.path.join(temp_dir, 'profiles.json'))
+            store.set('default', 1234.0)
+            handler = AudioHandler(noise_profiles=store)
+            
+            with mock.patch('audio_handler.sr.Microphone'), \
+                    mock.patch.object(handler, '_default_device_name', return_value='default'), \
+                    mock.patch.object(handler.recognizer, 'adjust_for_ambient_noise') as adjust, \
+                    mock.patch.object(handler.recognizer, 'listen', return_value='audio'):
+                self.assertEqual(handler.record_from_microphone(duration=1), 'audio')
+                
+            adjust.assert_not_called()
+            
+    def test_noise_profile_calibrated_once(self):
+        """Test the first recording on a device calibrates and stores the profile"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = NoiseProfileStore(os.path.join(temp_dir, 'profiles.json'))
+            handler = AudioHandler(noise_profiles=store)
+            
+            def adjust(source, duration):
+                handler.recognizer.energy_threshold = 500.0
+                
+            with mock.patch('audio_handler.sr.Microphone'), \
+                    mock.patch.object(handler, '_default_device_name', return_value='default'), \
+                    mock.patch.object(handler.recognizer, 'adjust_for_ambient_noise', side_effect=adjust) as calibrate, \
+                    mock.patch.object(handler.recognizer, 'listen', return_value='audio'):
+                handler.record_from_microphone(duration=1)
+                handler.record_from_microphone(duration=1)
+                
+            self.assertEqual(calibrate.call_count, 1)
+            self.assertAlmostEqual(store.get('default'), 500.0)
+            
+    def test_default_microphone_profile_follows_device(self):
+        """Test the default device is keyed by its name, so switching it recalibrates"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = NoiseProfileStore(os.path.join(temp_dir, 'profiles.json'))
+            store.set('Built-in Microphone', 300.0)
+            handler = AudioHandler(noise_profiles=store)
+            
+            with mock.patch('audio_handler.sr.Microphone') as microphone, \
+                    mock.patch.object(handler.recognizer, 'adjust_for_ambient_noise') as adjust, \
+                    mock.patch.object(handler.recognizer, 'listen', return_value='audio'):
+                source = microphone.return_value.__enter__.return_value
+                source.audio.get_default_input_device_info.return_value = {'name': 'USB Headset'}
+                handler.record_from_microphone(duration=1)
+                
+            adjust.assert_called_once()
+            self.assertIsNotNone(store.get('USB Headset'))
+            # The name comes from the microphone's own PyAudio instance
+            microphone.get_pyaudio.assert_not_called()
+            
+    def test_default_microphone_name_fallback(self):
+        """Test the default device falls back to a fixed key when its name is unavailable"""
+        source = mock.Mock()
+        source.audio.get_default_input_device_info.side_effect = OSError("No Default Input Device Available")
+        self.assertEqual(self.handler._device_name(None, source), 'default')
+            
+    def test_device_list_refreshed_after_hotplug(self):
+        """Test an unknown device index refreshes the cached device list"""
+        with mock.patch.object(self.handler, 'list_microphones',
+                               side_effect=[['Built-in'], ['Built-in', 'USB Headset']]):
+            self.assertEqual(self.handler._device_name(0, None), 'Built-in')
+            self.assertEqual(self.handler._device_name(1, None), 'USB Headset')
+            
     def test_list_microphones(self):
         """Test listing microphones"""
-        mics = self.handler.list_microphones()
-        self.assertIsInstance(mics, list)
-        # Should have at least one microphone (may fail on headless systems)
+        with mock.patch('audio_handler.sr.Microphone.list_microphone_names',
+                        return_value=['Built-in Microphone']):
+            mics = self.handler.list_microphones()
+        self.assertEqual(mics, ['Built-in Microphone'])
+        
+    def test_converted_files_load_in_parallel(self):
+        """Test non-WAV files are converted in memory, without a shared temp file"""
+        from pydub import AudioSegment
+        
+        def fake_decode(file_path):
+            # Stereo 8 kHz tone whose pitch identifies the file
+            t = np.arange(8000) / 8000
+            tone = (np.sin(2 * np.pi * (220 if 'a.mp3' in file_path else 440) * t) * 10000).astype(np.int16)
+            return AudioSegment(np.repeat(tone, 2).tobytes(), sample_width=2, frame_rate=8000, channels=2)
+            
+        results = {}
+        with tempfile.TemporaryDirectory() as work_dir, \
+                mock.patch('audio_handler.AudioSegment.from_file', side_effect=fake_decode):
+            def load(name):
+                results[name] = self.handler.load_audio_file(os.path.join(work_dir, name))
+                
+            threads = [threading.Thread(target=load, args=(name,)) for name in ('a.mp3', 'b.mp3')]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertFalse(os.path.exists('temp_audio.wav'))
+            
+        for audio_data in results.values():
+            self.assertEqual((audio_data.sample_rate, audio_data.sample_width), (16000, 2))
+            self.assertAlmostEqual(len(audio_data.frame_data), 16000 * 2, delta=4)
+        self.assertNotEqual(results['a.mp3'].frame_data, results['b.mp3'].frame_data)
+        
+    def test_record_continuous_from_source(self):
+        """Test continuous recording runs headless on a synthetic source"""
+        phrases = []
+        source = SyntheticSource(duration=6, burst_seconds=1.0, pause_seconds=1.0)
+        
+        self.handler.record_continuous(phrases.append, phrase_time_limit=3, source=source)
+        
+        self.assertTrue(source.exhausted)
+        self.assertGreaterEqual(len(phrases), 3)
+        self.assertTrue(all(isinstance(phrase, sr.AudioData) for phrase in phrases))
+        
+class TestNoiseProfileStore(unittest.TestCase):
+    """Test cases for the noise profile store"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, 'profiles.json')
+        
+    def tearDown(self):
+        """Remove temporary files"""
+        self.temp_dir.cleanup()
+        
+    def test_unknown_device(self):
+        """Test unknown devices have no profile"""
+        self.assertIsNone(NoiseProfileStore(self.file_path).get('Mic'))
+        
+    def test_persistence(self):
+        """Test profiles survive a new store instance"""
+        NoiseProfileStore(self.file_path).set('Mic', 300.0)
+        self.assertEqual(NoiseProfileStore(self.file_path).get('Mic'), 300.0)
+        
+    def test_incremental_update(self):
+        """Test updates are blended into the stored value"""
+        store = NoiseProfileStore(self.file_path, smoothing=0.5)
+        store.set('Mic', 100.0)
+        self.assertAlmostEqual(store.update('Mic', 200.0), 150.0)
+        self.assertAlmostEqual(NoiseProfileStore(self.file_path).get('Mic'), 150.0)
+        
+class SimulatedStream(AudioSource):
+    """Two-channel in-memory source standing in for a capture device"""
+    
+    def __init__(self, name, seconds=2, sample_rate=16000):
+        super().__init__(name, channels=2, sample_rate=sample_rate)
+        
+        # Channel 0 carries a loud tone, channel 1 stays silent
+        t = np.arange(int(seconds * sample_rate)) / sample_rate
+        tone = (8000 * np.sin(2 * np.pi * 440 * t)).astype('<i2')
+        frames = np.stack([tone, np.zeros_like(tone)], axis=1)
+        self._data = frames.tobytes()
+        self._offset = 0
+        
+    def _read_frames(self, frames):
+        size = frames * self.channels * self.sample_width
+        chunk = self._data[self._offset:self._offset + size]
+        self._offset += size
+        return chunk
+        
+class TestCaptureManager(unittest.TestCase):
+    """Test cases for multi-device capture"""
+    
+    def test_deinterleave(self):
+        """Test interleaved frames are split per channel"""
+        raw = np.array([1, 10, 2, 20, 3, 30], dtype='<i2').tobytes()
+        channels = deinterleave(raw, 2)
+        self.assertEqual(channels.shape, (2, 3))
+        self.assertEqual(channels[0].tolist(), [1, 2, 3])
+        self.assertEqual(channels[1].tolist(), [10, 20, 30])
+        
+    def test_results_tagged_by_source(self):
+        """Test every stream is captured and silent channels are skipped"""
+        recognizer = mock.Mock()
+        recognizer.recognize_batch.side_effect = lambda clips: ["hello"] * len(clips)
+        streams = [SimulatedStream("room-a"), SimulatedStream("room-b")]
+        
+        manager = CaptureManager(recognizer, streams, segment_seconds=1, batch_size=4, workers=2)
+        manager.start()
+        manager.join()
+        results = manager.drain_results()
+        
+        self.assertEqual(len(results), 4)
+        self.assertEqual({result.tag for result in results}, {"room-a:ch0", "room-b:ch0"})
+        self.assertEqual(sorted(result.start_time for result in results), [0.0, 0.0, 1.0, 1.0])
+        self.assertAlmostEqual(manager.audio_seconds, 4.0, places=1)
+        self.assertEqual(manager.segments_recognized, 4)
+        
+class TestAudioSources(unittest.TestCase):
+    """Test cases for headless audio sources"""
+    
+    def test_synthetic_duration(self):
+        """Test synthetic sources stop after their duration"""
+        with SyntheticSource(duration=1, channels=2) as source:
+            total = 0
+            while True:
+                data = source.read(1024)
+                if not data:
+                    break
+                total += len(data)
+        self.assertEqual(total, 16000 * 2 * 2)
+        self.assertAlmostEqual(source.seconds_read, 1.0)
+        
+    def test_file_replay_speed(self):
+        """Test file replay is paced to the requested speed"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'tone.wav')
+            with open(file_path, 'wb') as f:
+                f.write(sr.AudioData(b"\x10\x00" * 16000, 16000, 2).get_wav_data())
+                
+            start = time.monotonic()
+            with FileReplaySource(file_path, speed=10) as source:
+                while source.read(1600):
+                    pass
+            elapsed = time.monotonic() - start
+            
+        self.assertAlmostEqual(source.seconds_read, 1.0)
+        self.assertGreaterEqual(elapsed, 0.09)
+        
+    def test_file_replay_loops(self):
+        """Test file replay repeats the configured number of times"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'tone.wav')
+            with open(file_path, 'wb') as f:
+                f.write(sr.AudioData(b"\x10\x00" * 1600, 16000, 2).get_wav_data())
+                
+            with FileReplaySource(file_path, speed=None, loops=3) as source:
+                while source.read(1024):
+                    pass
+                    
+        self.assertAlmostEqual(source.seconds_read, 0.3)
+        
+def make_log_probs(path, vocab_size=8, peak=0.0, floor=-8.0):
+    """CTC log-probabilities whose greedy decoding follows path (one token id per frame)"""
+    log_probs = np.full((len(path), vocab_size), floor)
+    log_probs[np.arange(len(path)), path] = peak
+    return log_probs
+    
+class TestKeywordSpotter(unittest.TestCase):
+    """Test cases for CTC keyword spotting"""
+    
+    # Vocabulary: 0 blank, 1 word delimiter, 2-4 letters A-C
+    VOCAB = {"<pad>": 0, "|": 1, "A": 2, "B": 3, "C": 4, "<unk>": 5, "<s>": 6, "</s>": 7}
+    
+    def setUp(self):
+        """Set up a tokenizer and a stand-in acoustic model"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        vocab_file = os.path.join(self.temp_dir.name, 'vocab.json')
+        with open(vocab_file, 'w') as f:
+            json.dump(self.VOCAB, f)
+            
+        self.recognizer = mock.Mock()
+        self.recognizer.tokenizer = Wav2Vec2CTCTokenizer(vocab_file)
+        self.recognizer.frame_seconds = 0.02
+        self.recognizer.decode_log_probs.return_value = "C AB C"
+        
+        # Greedy path spells "C AB C" with repeated frames and blanks
+        self.recognizer.compute_log_probs.return_value = make_log_probs(
+            [0, 4, 4, 0, 1, 2, 2, 0, 3, 1, 4, 0]
+        )
+        self.audio = sr.AudioData(b"\x00\x00" * 16000, 16000, 2)
+        
+    def tearDown(self):
+        """Remove temporary files"""
+        self.temp_dir.cleanup()
+        
+    def test_score_exact_keyword(self):
+        """Test a keyword on the greedy path scores zero with its frame span"""
+        log_probs = self.recognizer.compute_log_probs.return_value
+        score, start, end = ctc_keyword_score(log_probs, [2, 3], blank_id=0)
+        self.assertEqual(score, 0.0)
+        self.assertEqual((start, end), (5, 8))
+        
+    def test_score_absent_keyword(self):
+        """Test a keyword that is not spoken is penalized"""
+        log_probs = self.recognizer.compute_log_probs.return_value
+        score, _, _ = ctc_keyword_score(log_probs, [3, 3, 4], blank_id=0)
+        self.assertLess(score, -8.0)
+        
+    def test_spot_and_escalate(self):
+        """Test matches fire callbacks with timestamps and a transcript"""
+        fired = []
+        spotter = KeywordSpotter(["ab", "ba"], recognizer=self.recognizer, on_match=fired.append)
+        
+        matches = spotter.process(self.audio)
+        
+        self.assertEqual([match.keyword for match in matches], ["ab"])
+        self.assertEqual(fired, matches)
+        self.assertAlmostEqual(matches[0].start_time, 0.10)
+        self.assertAlmostEqual(matches[0].end_time, 0.18)
+        self.assertAlmostEqual(matches[0].confidence, 1.0)
+        self.assertEqual(matches[0].transcript, "C AB C")
+        
+    def test_cpu_time_includes_worker_threads(self):
+        """Test inference CPU time on other threads (e.g. torch intra-op) is counted"""
+        log_probs = self.recognizer.compute_log_probs.return_value
+        
+        def compute_on_worker(audio_data):
+            def burn():
+                deadline = time.process_time() + 0.2
+                while time.process_time() < deadline:
+                    pass
+            worker = threading.Thread(target=burn)
+            worker.start()
+            worker.join()
+            return log_probs
+            
+        self.recognizer.compute_log_probs.side_effect = compute_on_worker
+        spotter = KeywordSpotter(["ab"], recognizer=self.recognizer)
+        spotter.process(self.audio)
+        
+        self.assertGreaterEqual(spotter.spot_seconds, 0.15)
+        
+    def test_concurrent_phrases_run_in_parallel(self):
+        """Test concurrent process() calls are not serialized around inference"""
+        log_probs = self.recognizer.compute_log_probs.return_value
+        both_inside = threading.Barrier(2, timeout=5)
+        
+        def compute(audio_data):
+            # Each call only returns once the other one is inside inference too
+            both_inside.wait()
+            return log_probs
+            
+        self.recognizer.compute_log_probs.side_effect = compute
+        spotter = KeywordSpotter(["ab"], recognizer=self.recognizer)
+        
+        threads = [threading.Thread(target=spotter.process, args=(self.audio,)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+            
+        self.assertFalse(both_inside.broken)
+        self.assertEqual(spotter.stats()['phrases'], 2)
+        
+    def test_no_escalation_without_match(self):
+        """Test phrases without keywords skip full transcription"""
+        full_recognizer = mock.Mock()
+        spotter = KeywordSpotter(["ba"], recognizer=self.recognizer, full_recognizer=full_recognizer)
+        
+        self.assertEqual(spotter.process(self.audio), [])
+        spotter.process(self.audio)
+        
+        full_recognizer.recognize.assert_not_called()
+        stats = spotter.stats(full_cost_per_second=1.0)
+        self.assertEqual(stats['phrases'], 2)
+        self.assertEqual(stats['full_transcriptions_avoided'], 2)
+        self.assertAlmostEqual(stats['audio_seconds'], 2.0)
+        self.assertGreater(stats['cpu_saved_fraction'], 0.5)
         
+    def test_unspellable_keyword(self):
+        """Test keywords outside the model vocabulary are rejected"""
+        with self.assertRaises(ValueError):
+            KeywordSpotter(["xyz"], recognizer=self.recognizer)
+        
+class FakeEngine:
+    """Stand-in recognizer with a fixed delay and outcome"""
+    
+    def __init__(self, name, delay=0.0, text=None, error=None):
+        self.name = name
+        self.delay = delay
+        self.text = text
+        self.error = error
+        self.calls = 0
+        
+    def transcribe(self, audio_data, timeout=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.text
+        
+class TestEngineRouter(unittest.TestCase):
+    """Test cases for engine fallback and hedging"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.audio = sr.AudioData(b"\x00\x00" * 1600, 16000, 2)
+        
+    def make_router(self, engines, **kwargs):
+        """Build a router over fake engines"""
+        router = EngineRouter(
+            order=[engine.name for engine in engines],
+            recognizers={engine.name: engine for engine in engines},
+            **kwargs
+        )
+        self.addCleanup(router.shutdown)
+        return router
+        
+    def test_primary_answers(self):
+        """Test the first engine's answer is used"""
+        primary = FakeEngine('google', text='hello')
+        backup = FakeEngine('wav2vec2', text='backup')
+        result = self.make_router([primary, backup], hedge=False).transcribe(self.audio)
+        
+        self.assertEqual((result.engine, result.text, result.hedged), ('google', 'hello', False))
+        self.assertEqual(backup.calls, 0)
+        
+    def test_fallback_on_failure(self):
+        """Test the next engine is tried when one fails"""
+        primary = FakeEngine('google', error=EngineUnavailableError("offline", 'google'))
+        backup = FakeEngine('wav2vec2', text='backup')
+        result = self.make_router([primary, backup], hedge=False).transcribe(self.audio)
+        
+        self.assertEqual((result.engine, result.text), ('wav2vec2', 'backup'))
+        
+    def test_fallback_on_deadline(self):
+        """Test engines that miss their deadline are abandoned"""
+        primary = FakeEngine('google', delay=1.0, text='late')
+        backup = FakeEngine('wav2vec2', text='backup')
+        router = self.make_router([primary, backup], hedge=False, deadlines={'google': 0.1})
+        
+        start = time.monotonic()
+        result = router.transcribe(self.audio)
+        
+        self.assertEqual(result.engine, 'wav2vec2')
+        self.assertLess(time.monotonic() - start, 0.8)
+        
+    def test_hedge_wins(self):
+        """Test a slow primary is hedged and the faster answer returned"""
+        primary = FakeEngine('google', delay=1.0, text='slow')
+        hedge = FakeEngine('wav2vec2', delay=0.05, text='fast')
+        router = self.make_router([primary, hedge], hedge=True, hedge_engine='wav2vec2')
+        
+        with mock.patch.dict('engine_router.ROUTING_CONFIG', {'hedge_after_seconds': 0.1}):
+            result = router.transcribe(self.audio)
+            
+        self.assertEqual((result.engine, result.text, result.hedged), ('wav2vec2', 'fast', True))
+        
+    def test_hedge_engine_outside_order(self):
+        """Test hedging works with an engine that is not in the fallback order"""
+        primary = FakeEngine('google', delay=1.0, text='slow')
+        hedge = FakeEngine('wav2vec2', delay=0.05, text='fast')
+        router = EngineRouter(
+            order=['google'], hedge=True, hedge_engine='wav2vec2',
+            recognizers={'google': primary, 'wav2vec2': hedge}
+        )
+        self.addCleanup(router.shutdown)
+        
+        with mock.patch.dict('engine_router.ROUTING_CONFIG', {'hedge_after_seconds': 0.1}):
+            result = router.transcribe(self.audio)
+            
+        self.assertEqual((result.engine, result.hedged), ('wav2vec2', True))
+        
+    def test_recognize_chunked_routes_each_chunk(self):
+        """Test chunked recognition through the router used by the GUI"""
+        primary = FakeEngine('google', text='hello')
+        router = self.make_router([primary], hedge=False)
+        audio = sr.AudioData(b"\x00\x00" * 16000 * 5, 16000, 2)
+        progress = []
+        
+        text = router.recognize_chunked(audio, chunk_seconds=2, progress_callback=progress.append)
+        
+        self.assertEqual(text, "hello hello hello")
+        self.assertEqual(primary.calls, 3)
+        self.assertAlmostEqual(progress[-1], 1.0)
+        
+    def test_transcribe_chunked_reports_engines(self):
+        """Test chunked routing names the engines that answered"""
+        primary = FakeEngine('google', error=EngineUnavailableError("offline", 'google'))
+        backup = FakeEngine('wav2vec2', text='backup')
+        router = self.make_router([primary, backup], hedge=False)
+        audio = sr.AudioData(b"\x00\x00" * 16000 * 4, 16000, 2)
+        
+        result = router.transcribe_chunked(audio, chunk_seconds=2)
+        
+        self.assertEqual(result.text, "backup backup")
+        self.assertEqual(result.engine, 'wav2vec2')
+        self.assertFalse(result.hedged)
+        
+    def test_no_speech_is_final(self):
+        """Test a no-speech answer is not retried on other engines"""
+        primary = FakeEngine('google', error=NoSpeechError("silence", 'google'))
+        backup = FakeEngine('wav2vec2', text='backup')
+        
+        with self.assertRaises(NoSpeechError):
+            self.make_router([primary, backup], hedge=False).transcribe(self.audio)
+        self.assertEqual(backup.calls, 0)
+        
+    def test_hedge_no_speech_waits_for_primary(self):
+        """Test the hedge finding no speech does not discard the primary's answer"""
+        primary = FakeEngine('google', delay=0.4, text='hello')
+        hedge = FakeEngine('wav2vec2', delay=0.05, error=NoSpeechError("nothing", 'wav2vec2'))
+        router = self.make_router([primary, hedge], hedge=True, hedge_engine='wav2vec2')
+        
+        with mock.patch.dict('engine_router.ROUTING_CONFIG', {'hedge_after_seconds': 0.1}):
+            result = router.transcribe(self.audio)
+            
+        self.assertEqual((result.engine, result.text, result.hedged), ('google', 'hello', False))
+        self.assertEqual(hedge.calls, 1)
+        
+    def test_hedge_no_speech_final_when_primary_fails(self):
+        """Test the hedge's no-speech verdict stands once the primary has failed"""
+        primary = FakeEngine('google', delay=0.4, error=EngineUnavailableError("offline", 'google'))
+        hedge = FakeEngine('wav2vec2', delay=0.05, error=NoSpeechError("nothing", 'wav2vec2'))
+        router = self.make_router([primary, hedge], hedge=True, hedge_engine='wav2vec2')
+        
+        with mock.patch.dict('engine_router.ROUTING_CONFIG', {'hedge_after_seconds': 0.1}):
+            with self.assertRaises(NoSpeechError):
+                router.transcribe(self.audio)
+                
+    def test_all_engines_failed(self):
+        """Test the collected errors are reported when every engine fails"""
+        engines = [
+            FakeEngine('google', error=EngineUnavailableError("offline", 'google')),
+            FakeEngine('wav2vec2', error=EngineUnavailableError("no model", 'wav2vec2'))
+        ]
+        with self.assertRaises(AllEnginesFailedError) as context:
+            self.make_router(engines, hedge=False).transcribe(self.audio)
+        self.assertEqual(len(context.exception.errors), 2)
+        
+    def test_latency_histogram(self):
+        """Test percentile estimates follow recorded latencies"""
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.percentile(95))
+        for _ in range(95):
+            histogram.record(0.1)
+        for _ in range(5):
+            histogram.record(5.0)
+            
+        self.assertLess(histogram.percentile(50), 0.15)
+        self.assertLess(histogram.percentile(95), 0.15)
+        self.assertGreaterEqual(histogram.percentile(99), 5.0)
+        
+class TestTranscriptStore(unittest.TestCase):
+    """Test cases for the structured transcript store"""
+    
+    def setUp(self):
+        """Set up an in-memory store with a few transcripts"""
+        self.store = TranscriptStore(":memory:")
+        self.store.add_many([
+            {'text': 'turn on the kitchen lights', 'source': 'a.wav', 'engine': 'google',
+             'language': 'en-US', 'created_at': 1000.0, 'confidence': 0.9,
+             'words': [['turn', 0.0, 0.2], ['on', 0.2, 0.3]]},
+            {'text': 'the lights are on', 'source': 'b.wav', 'engine': 'wav2vec2',
+             'language': 'en', 'created_at': 2000.0},
+            {'text': 'schedule a meeting', 'source': 'a.wav', 'engine': 'google',
+             'language': 'en-US', 'created_at': 3000.0},
+        ])
+        
+    def tearDown(self):
+        """Close the store"""
+        self.store.close()
+        
+    def test_phrase_search(self):
+        """Test full-text phrase queries"""
+        self.assertEqual(self.store.count('lights'), 2)
+        results = self.store.search('kitchen lights')
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['words'], [['turn', 0.0, 0.2], ['on', 0.2, 0.3]])
+        self.assertEqual(self.store.count('lights kitchen'), 0)
+        
+    def test_filters(self):
+        """Test source and time range filters"""
+        self.assertEqual(self.store.count(source='a.wav'), 2)
+        self.assertEqual(self.store.count('lights', since=1500.0), 1)
+        results = self.store.search(source='a.wav', until=2500.0)
+        self.assertEqual([result['text'] for result in results], ['turn on the kitchen lights'])
+        
+    def test_newest_first(self):
+        """Test results are ordered newest first"""
+        results = self.store.search()
+        self.assertEqual([result['created_at'] for result in results], [3000.0, 2000.0, 1000.0])
+        
+    def test_bulk_insert_is_transactional(self):
+        """Test a bad record stores nothing from its batch"""
+        with self.assertRaises(ValueError):
+            self.store.add_many([{'text': 'ok'}, {'text': ''}])
+        self.assertEqual(self.store.count(), 3)
+        self.assertEqual(self.store.count('ok'), 0)
+        
+    def test_export_columnar(self):
+        """Test Parquet export of filtered transcripts"""
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow not installed")
+            
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'transcripts.parquet')
+            self.assertEqual(self.store.export_columnar(file_path, engine='google'), 2)
+            table = pq.read_table(file_path)
+            
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(table.column('source').to_pylist(), ['a.wav', 'a.wav'])
+        
+    def test_export_does_not_block_writers(self):
+        """Test a file store exports over its own connection while adds continue"""
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow not installed")
+            
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                TranscriptStore(os.path.join(temp_dir, 'transcripts.db')) as store:
+            store.add_many({'text': f'phrase {i}', 'engine': 'google'} for i in range(100))
+            file_path = os.path.join(temp_dir, 'transcripts.parquet')
+            
+            # Exporting with the store lock held elsewhere would deadlock
+            with store._lock:
+                exporter = threading.Thread(target=store.export_columnar, args=(file_path,),
+                                            kwargs={'batch_size': 10})
+                exporter.start()
+                exporter.join(timeout=10)
+            self.assertFalse(exporter.is_alive())
+            
+            store.add('after export')
+            self.assertEqual(pq.read_table(file_path).num_rows, 100)
+            self.assertEqual(store.count(), 101)
+            
+class TestModelPool(unittest.TestCase):
+    """Test cases for the LRU model pool"""
+    
+    def make_pool(self, budget_mb=3, max_models=5):
+        """Pool whose values are their own size in MB"""
+        return ModelPool(
+            memory_budget_mb=budget_mb,
+            max_models=max_models,
+            size_fn=lambda value: value * 1024 * 1024
+        )
+        
+    def test_hit_and_miss(self):
+        """Test models are loaded once and then served from the pool"""
+        pool = self.make_pool()
+        loader = mock.Mock(return_value=1)
+        
+        pool.get('en', loader)
+        pool.get('en', loader)
+        
+        loader.assert_called_once_with('en')
+        self.assertEqual((pool.hits, pool.misses), (1, 1))
+        
+    def test_lru_eviction_under_budget(self):
+        """Test the least recently used model is evicted to stay within budget"""
+        pool = self.make_pool(budget_mb=3)
+        pool.get('en', lambda key: 1)
+        pool.get('fr', lambda key: 1)
+        pool.get('en', lambda key: 1)
+        pool.get('de', lambda key: 2)
+        
+        self.assertEqual(pool.keys(), ['en', 'de'])
+        self.assertEqual(pool.resident_bytes, 3 * 1024 * 1024)
+        self.assertEqual(pool.evictions, 1)
+        
+    def test_max_models(self):
+        """Test the model count limit"""
+        pool = self.make_pool(budget_mb=100, max_models=2)
+        for key in ('en', 'fr', 'de'):
+            pool.get(key, lambda key: 1)
+        self.assertEqual(pool.keys(), ['fr', 'de'])
+        
+    def test_pinned_lid_model_not_reloaded(self):
+        """Test alternating LID and CTC requests under the default budget load each model once"""
+        pool = ModelPool(size_fn=lambda value: value * 1024 * 1024)
+        lid_loader = mock.Mock(return_value=3900)
+        ctc_loader = mock.Mock(return_value=1300)
+        
+        for _ in range(3):
+            pool.get('facebook/mms-lid-126@cpu', lid_loader, pinned=MODEL_CONFIG['language_id']['pinned'])
+            pool.get('xlsr-53-french@cpu', ctc_loader)
+            
+        lid_loader.assert_called_once()
+        ctc_loader.assert_called_once()
+        self.assertEqual(pool.keys(), ['xlsr-53-french@cpu'])
+        self.assertEqual(pool.pinned_keys(), ['facebook/mms-lid-126@cpu'])
+        self.assertEqual(pool.evictions, 0)
+        
+    def test_pinned_models_count_against_budget(self):
+        """Test evictable models only share the budget the pinned ones leave"""
+        pool = self.make_pool(budget_mb=4)
+        for key in ('en', 'fr', 'de'):
+            pool.get(key, lambda key: 1)
+        pool.get('lid', lambda key: 2, pinned=True)
+        
+        self.assertEqual(pool.keys(), ['fr', 'de'])
+        pool.get('es', lambda key: 1)
+        
+        self.assertEqual(pool.keys(), ['de', 'es'])
+        self.assertEqual(pool.pinned_keys(), ['lid'])
+        self.assertLessEqual(pool.resident_bytes + pool.pinned_bytes, pool.budget_bytes)
+        
+    def test_concurrent_load_once(self):
+        """Test concurrent requests for one model share a single load"""
+        pool = self.make_pool()
+        calls = []
+        
+        def slow_loader(key):
+            calls.append(key)
+            time.sleep(0.1)
+            return 1
+            
+        threads = [threading.Thread(target=pool.get, args=('en', slow_loader)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+            
+        self.assertEqual(calls, ['en'])
+        
+def synthetic_voice(f0, tilt, seconds, sample_rate=16000, seed=0):
+    """Harmonic tone whose pitch and spectral tilt stand in for a speaker"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    phase = 2 * np.pi * np.cumsum(f0 * (1 + 0.03 * np.sin(2 * np.pi * 3 * t))) / sample_rate
+    voice = sum(k ** -tilt * np.sin(k * phase) for k in range(1, 30))
+    voice = voice / np.abs(voice).max() * 8000 * (0.6 + 0.4 * np.abs(np.sin(2 * np.pi * 2 * t)))
+    return voice + rng.normal(0, 100, len(t))
+
+class TestDiarizer(unittest.TestCase):
+    """Test cases for speaker-change segmentation"""
+    
+    def setUp(self):
+        """Alternate two synthetic speakers, 4 s each with short pauses"""
+        parts = []
+        for turn in range(4):
+            if turn % 2 == 0:
+                parts.append(synthetic_voice(220, 0.5, 4, seed=turn))
+            else:
+                parts.append(synthetic_voice(110, 2.0, 4, seed=turn))
+            parts.append(np.zeros(int(0.3 * 16000)))
+        self.samples = np.concatenate(parts).astype(np.int16)
+        self.audio = sr.AudioData(self.samples.tobytes(), 16000, 2)
+        self.boundaries = [4.3, 8.6, 12.9]
+        
+    def test_speaker_turns(self):
+        """Test turns alternate between two speakers near the true boundaries"""
+        segments = Diarizer().segment(self.audio)
+        
+        self.assertEqual([segment.speaker for segment in segments], [0, 1, 0, 1])
+        for segment, boundary in zip(segments, self.boundaries):
+            self.assertAlmostEqual(segment.end_time, boundary, delta=0.6)
+        self.assertEqual(segments[-1].end_time, len(self.samples) / 16000)
+        
+    def test_block_size_does_not_change_embeddings(self):
+        """Test block-wise processing matches processing everything at once"""
+        small, _ = Diarizer(block_seconds=2).embed(self.samples, 16000)
+        large, _ = Diarizer(block_seconds=600).embed(self.samples, 16000)
+        np.testing.assert_allclose(small, large, atol=1e-4)
+        
+    def test_silence_has_no_turns(self):
+        """Test silent audio produces no segments"""
+        audio = sr.AudioData(np.zeros(16000 * 5, dtype=np.int16).tobytes(), 16000, 2)
+        self.assertEqual(Diarizer().segment(audio), [])
+        
+    def test_max_speakers(self):
+        """Test the speaker limit is respected"""
+        segments = Diarizer(max_speakers=1).segment(self.audio)
+        self.assertEqual({segment.speaker for segment in segments}, {0})
+        
+    def test_transcribe_batches_turns(self):
+        """Test every turn is recognized through batched calls with timings reported"""
+        recognizer = mock.Mock()
+        recognizer.recognize_batch.side_effect = lambda clips: [f"clip {len(clip.frame_data)}" for clip in clips]
+        
+        result = Diarizer().transcribe(self.audio, recognizer, max_segment_seconds=3)
+        
+        self.assertEqual(result.speakers, 2)
+        self.assertTrue(all(segment.duration <= 3 + 1e-6 for segment in result.segments))
+        self.assertTrue(all(segment.text for segment in result.segments))
+        batched = sum(len(call.args[0]) for call in recognizer.recognize_batch.call_args_list)
+        self.assertEqual(batched, len(result.segments))
+        self.assertEqual(
+            set(result.timings), {'audio_seconds', 'diarization_seconds', 'recognition_seconds'}
+        )
+        self.assertIn("Speaker 2:", result.transcript())
+        
+    def test_transcribe_progress_and_cancel(self):
+        """Test progress is reported per batch and cancellation stops between batches"""
+        cancel_event = threading.Event()
+        progress = []
+        recognizer = mock.Mock()
+        
+        def recognize_batch(clips):
+            cancel_event.set()
+            return ["text"] * len(clips)
+            
+        recognizer.recognize_batch.side_effect = recognize_batch
+        with mock.patch.dict('diarization.PERFORMANCE', {'recognition_batch_size': 1}):
+            result = Diarizer().transcribe(
+                self.audio, recognizer, progress_callback=progress.append, cancel_event=cancel_event
+            )
+            
+        self.assertIsNone(result)
+        recognizer.recognize_batch.assert_called_once()
+        self.assertEqual(len(progress), 1)
+        self.assertLess(progress[0], 1.0)
+        
+        recognizer.recognize_batch.side_effect = lambda clips: ["text"] * len(clips)
+        progress.clear()
+        Diarizer().transcribe(self.audio, recognizer, progress_callback=progress.append)
+        self.assertAlmostEqual(progress[-1], 1.0)
+        
+class TestSettings(unittest.TestCase):
+    """Test cases for lazily loaded settings"""
+    
+    def make_settings(self, environ, root=''):
+        """Settings over private copies of a few sections"""
+        sections = {
+            'PATHS': {
+                'output_dir': os.path.join(root, 'output'),
+                'log_file': os.path.join(root, 'logs', 'app.log')
+            },
+            'PERFORMANCE': {'max_concurrent_jobs': 2, 'chunk_seconds': 30},
+            'MODEL_CONFIG': {'pool': {'max_models': 3, 'memory_budget_mb': 4096}},
+            'LOGGING_CONFIG': {'handlers': {'file': {'filename': None}}}
+        }
+        return Settings(sections, environ=environ), sections
+        
+    def test_import_has_no_side_effects(self):
+        """Test importing config and utils creates nothing in the working directory"""
+        repo = os.path.dirname(os.path.abspath(__file__))
+        with tempfile.TemporaryDirectory() as work_dir:
+            subprocess.run(
+                [sys.executable, "-c", "import config, utils"],
+                cwd=work_dir,
+                env=dict(os.environ, PYTHONPATH=repo),
+                check=True
+            )
+            self.assertEqual(os.listdir(work_dir), [])
+            
+    def test_file_and_environment_overrides(self):
+        """Test the config file is applied first and environment variables win"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'settings.json')
+            with open(file_path, 'w') as f:
+                json.dump({'PERFORMANCE': {'max_concurrent_jobs': 8, 'chunk_seconds': 10}}, f)
+                
+            settings, sections = self.make_settings({
+                'SPEECH_CONFIG_FILE': file_path,
+                'SPEECH_PERFORMANCE__MAX_CONCURRENT_JOBS': '4',
+                'SPEECH_MODEL_CONFIG__POOL__MAX_MODELS': '1',
+                'SPEECH_PATHS__LOG_FILE': '/var/log/speech.log',
+                'SPEECH_API_KEY': 'unrelated'
+            })
+            settings.load()
+            
+        self.assertEqual(sections['PERFORMANCE'], {'max_concurrent_jobs': 4, 'chunk_seconds': 10})
+        self.assertEqual(sections['MODEL_CONFIG']['pool'], {'max_models': 1, 'memory_budget_mb': 4096})
+        self.assertEqual(sections['LOGGING_CONFIG']['handlers']['file']['filename'], '/var/log/speech.log')
+        
+    def test_unknown_file_section(self):
+        """Test a misspelled section in the config file is reported"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'settings.json')
+            with open(file_path, 'w') as f:
+                json.dump({'PERFORMANCES': {}}, f)
+                
+            settings, _ = self.make_settings({'SPEECH_CONFIG_FILE': file_path})
+            with self.assertRaises(ValueError):
+                settings.load()
+                
+    def test_get_path_creates_directory_once(self):
+        """Test directories are created on first use only"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            settings, _ = self.make_settings({}, root=temp_dir)
+            
+            log_file = settings.get_path('log_file')
+            self.assertTrue(os.path.isdir(os.path.join(temp_dir, 'logs')))
+            self.assertFalse(os.path.exists(log_file))
+            self.assertFalse(os.path.exists(os.path.join(temp_dir, 'output')))
+            
+            with mock.patch('os.makedirs') as makedirs:
+                settings.get_path('log_file')
+            makedirs.assert_not_called()
+            
+            self.assertTrue(os.path.isdir(settings.get_path('output_dir')))
+            
+    def test_override_and_reset(self):
+        """Test per-process overrides and restoring the defaults"""
+        settings, sections = self.make_settings({})
+        settings.override({'PATHS': {'log_file': 'logs/worker-1.log'}})
+        self.assertEqual(sections['LOGGING_CONFIG']['handlers']['file']['filename'], 'logs/worker-1.log')
+        
+        settings.reset()
+        settings.load()
+        self.assertEqual(sections['PATHS']['log_file'], os.path.join('logs', 'app.log'))
+        
+    def test_module_sections_load_on_first_read(self):
+        """Test the module-level dicts pick up environment overrides when read"""
+        try:
+            with mock.patch.dict(os.environ, {'SPEECH_PERFORMANCE__CHUNK_SECONDS': '12'}):
+                config.settings.reset()
+                self.assertFalse(config.settings.loaded)
+                self.assertEqual(config.PERFORMANCE['chunk_seconds'], 12)
+                self.assertTrue(config.settings.loaded)
+        finally:
+            config.settings.reset()
+            use_test_log_file()
+        self.assertEqual(config.PERFORMANCE['chunk_seconds'], 30)
+        
+def _log_from_worker(log_dir, index):
+    """Pool worker: log to a per-worker file set with config.override"""
+    config.override({'PATHS': {'log_file': os.path.join(log_dir, f'worker-{index}.log')}})
+    logger = setup_logging()
+    logger.info(f"hello from worker {index}")
+    for handler in logger.handlers:
+        handler.flush()
+    return [getattr(handler, 'baseFilename', None) for handler in logger.handlers]
+    
+class TestLogFileOverride(unittest.TestCase):
+    """Test cases for per-process log files"""
+    
+    def tearDown(self):
+        """Return logging to the test log file"""
+        config.settings.reset()
+        use_test_log_file()
+        
+    def test_override_replaces_file_handler(self):
+        """Test an override moves an already configured logger to the new file"""
+        logger = setup_logging()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log_file = os.path.join(temp_dir, 'worker.log')
+            config.override({'PATHS': {'log_file': log_file}})
+            
+            file_handlers = [h for h in logger.handlers if isinstance(h, logging.FileHandler)]
+            self.assertEqual([h.baseFilename for h in file_handlers], [os.path.abspath(log_file)])
+            self.assertEqual(len(logger.handlers), 2)
+            config.settings.reset()
+            use_test_log_file()
+            
+        file_handlers = [h for h in logger.handlers if isinstance(h, logging.FileHandler)]
+        self.assertEqual([h.baseFilename for h in file_handlers], [os.path.abspath(config.PATHS['log_file'])])
+        self.assertEqual(os.path.dirname(config.PATHS['log_file']), _test_log_dir.name)
+        
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), "fork start method unavailable")
+    def test_forked_workers_log_to_own_files(self):
+        """Test forked pool workers that inherit the parent's handlers switch files"""
+        setup_logging()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with multiprocessing.get_context('fork').Pool(2) as pool:
+                pool.starmap(_log_from_worker, [(temp_dir, 0), (temp_dir, 1)])
+                
+            for index in (0, 1):
+                with open(os.path.join(temp_dir, f'worker-{index}.log')) as f:
+                    self.assertIn(f"hello from worker {index}", f.read())
+                    
 class TestUtils(unittest.TestCase):
     """Test cases for utility functions"""
     
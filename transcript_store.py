@@ -0,0 +1,276 @@
+"""
+Transcript Store
+SQLite storage for transcripts with FTS5 full-text search and columnar export
+"""
+
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from config import get_path
+from utils import setup_logging
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    source TEXT,
+    engine TEXT,
+    language TEXT,
+    created_at REAL NOT NULL,
+    start_time REAL,
+    end_time REAL,
+    processing_seconds REAL,
+    confidence REAL,
+    words TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transcripts_created_at ON transcripts(created_at);
+CREATE INDEX IF NOT EXISTS idx_transcripts_source ON transcripts(source, created_at);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS transcripts_fts USING fts5(
+    text,
+    content='transcripts',
+    content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS transcripts_ai AFTER INSERT ON transcripts BEGIN
+    INSERT INTO transcripts_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_ad AFTER DELETE ON transcripts BEGIN
+    INSERT INTO transcripts_fts(transcripts_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_au AFTER UPDATE OF text ON transcripts BEGIN
+    INSERT INTO transcripts_fts(transcripts_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO transcripts_fts(rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+COLUMNS = [
+    'text', 'source', 'engine', 'language', 'created_at', 'start_time',
+    'end_time', 'processing_seconds', 'confidence', 'words'
+]
+
+
+class TranscriptStore:
+    """Structured, searchable transcript storage"""
+
+    def __init__(self, db_path=None):
+        """
+        Open (and create if needed) a transcript database.
+
+        Args:
+            db_path: SQLite database file (":memory:" for a temporary store)
+        """
+        self.db_path = db_path or get_path('transcript_db')
+        self.logger = setup_logging()
+
+        directory = os.path.dirname(self.db_path)
+        if self.db_path != ":memory:" and directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # One connection shared by the GUI and worker threads, serialized by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            if self.db_path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row(record):
+        """Convert a transcript dict into an INSERT parameter tuple"""
+        if not record.get('text'):
+            raise ValueError("Transcript text is required")
+
+        words = record.get('words')
+        values = dict(record)
+        values['created_at'] = record.get('created_at') or time.time()
+        # Word timestamps are stored compactly as [word, start, end] triples
+        values['words'] = json.dumps(words, separators=(',', ':')) if words is not None else None
+        return tuple(values.get(column) for column in COLUMNS)
+
+    def add(self, text, **fields):
+        """
+        Store one transcript.
+
+        Args:
+            text: Transcribed text
+            **fields: Any of source, engine, language, created_at (Unix time),
+                start_time, end_time, processing_seconds, confidence and
+                words (list of [word, start, end]); the bundled engines do
+                not produce confidence or words yet
+
+        Returns:
+            Row id of the new transcript
+        """
+        row = self._row(dict(fields, text=text))
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"INSERT INTO transcripts ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                row
+            )
+            return cursor.lastrowid
+
+    def add_many(self, records):
+        """
+        Store many transcripts in a single transaction.
+
+        Args:
+            records: Iterable of dicts with a text key and optional fields as in add
+
+        Returns:
+            Number of transcripts stored
+        """
+        rows = [self._row(record) for record in records]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO transcripts ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows
+            )
+        self.logger.info(f"Stored {len(rows)} transcript(s)")
+        return len(rows)
+
+    def _where(self, phrase=None, source=None, engine=None, language=None, since=None, until=None):
+        """Build the WHERE clause shared by search, count and export"""
+        clauses = []
+        params = []
+
+        if phrase:
+            # Quote the phrase so FTS5 matches it literally
+            clauses.append("t.id IN (SELECT rowid FROM transcripts_fts WHERE transcripts_fts MATCH ?)")
+            params.append('"' + phrase.replace('"', '""') + '"')
+        for column, value in (('source', source), ('engine', engine), ('language', language)):
+            if value is not None:
+                clauses.append(f"t.{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("t.created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("t.created_at < ?")
+            params.append(until)
+
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def search(self, phrase=None, limit=100, **filters):
+        """
+        Query transcripts.
+
+        Args:
+            phrase: Text that must appear (full-text match)
+            limit: Maximum number of results
+            **filters: source, engine, language, since and until (Unix time)
+
+        Returns:
+            List of transcript dicts, newest first
+        """
+        where, params = self._where(phrase, **filters)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT t.* FROM transcripts t{where} ORDER BY t.created_at DESC, t.id DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def count(self, phrase=None, **filters):
+        """Number of transcripts matching the same arguments as search"""
+        where, params = self._where(phrase, **filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM transcripts t{where}", params).fetchone()[0]
+
+    @staticmethod
+    def _to_dict(row):
+        """Convert a database row to a transcript dict"""
+        record = dict(row)
+        if record['words'] is not None:
+            record['words'] = json.loads(record['words'])
+        return record
+
+    def export_columnar(self, file_path, batch_size=50000, **filters):
+        """
+        Export transcripts to a compressed Parquet file for analytics.
+
+        Rows are streamed in batches, so memory stays bounded for large
+        stores. File stores are read over a separate read-only connection:
+        in WAL mode it sees a consistent snapshot while add() keeps writing.
+
+        Args:
+            file_path: Output .parquet path
+            batch_size: Rows per Parquet row group
+            **filters: Same filters as search, including phrase
+
+        Returns:
+            Number of rows exported
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Columnar export requires pyarrow: pip install pyarrow")
+
+        schema = pa.schema([
+            ('id', pa.int64()),
+            ('text', pa.string()),
+            ('source', pa.dictionary(pa.int32(), pa.string())),
+            ('engine', pa.dictionary(pa.int8(), pa.string())),
+            ('language', pa.dictionary(pa.int16(), pa.string())),
+            ('created_at', pa.timestamp('ms')),
+            ('start_time', pa.float32()),
+            ('end_time', pa.float32()),
+            ('processing_seconds', pa.float32()),
+            ('confidence', pa.float32()),
+            ('words', pa.string())
+        ])
+
+        where, params = self._where(filters.pop('phrase', None), **filters)
+        exported = 0
+
+        with self._reader() as (conn, lock), lock, \
+                pq.ParquetWriter(file_path, schema, compression='zstd') as writer:
+            cursor = conn.execute(
+                f"SELECT t.id, {', '.join('t.' + column for column in COLUMNS)} "
+                f"FROM transcripts t{where} ORDER BY t.id",
+                params
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                columns = {name: [row[name] for row in rows] for name in schema.names}
+                columns['created_at'] = [int(value * 1000) for value in columns['created_at']]
+                writer.write_table(pa.table(columns, schema=schema))
+                exported += len(rows)
+
+        self.logger.info(f"Exported {exported} transcript(s) to {file_path}")
+        return exported
+
+    @contextlib.contextmanager
+    def _reader(self):
+        """Yield (connection, lock) for a long read that must not block writers"""
+        if self.db_path == ":memory:":
+            # An in-memory database is only visible to its own connection
+            yield self._conn, self._lock
+            return
+
+        uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn, contextlib.nullcontext()
+        finally:
+            conn.close()
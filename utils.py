@@ -6,24 +6,35 @@ Helper functions for logging, file operations, etc.
 import logging
 import os
 from datetime import datetime
+from config import PATHS, get_path, settings
 
-def setup_logging(log_file='speech_recognition.log', level=logging.INFO):
+# Log file the SpeechToText logger currently writes to
+_log_file = None
+
+def setup_logging(log_file=None, level=logging.INFO):
     """
     Setup logging configuration
     
+    Handlers are added once. The file handler is replaced when the log
+    path changes, e.g. after config.override() in a forked worker that
+    inherited the parent's handlers.
+    
     Args:
-        log_file: Path to log file
+        log_file: Path to log file (defaults to PATHS['log_file'])
         level: Logging level
         
     Returns: 
         Logger instance
     """
+    global _log_file
+    
     # Create logger
     logger = logging.getLogger('SpeechToText')
     logger.setLevel(level)
     
     # Avoid adding handlers multiple times
-    if logger.handlers:
+    requested = log_file or PATHS['log_file']
+    if logger.handlers and requested == _log_file:
         return logger
     
     # Create formatters
@@ -31,22 +42,44 @@ def setup_logging(log_file='speech_recognition.log', level=logging.INFO):
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
-    # File handler
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(level)
-    file_handler.setFormatter(formatter)
+    # Drop the handler for the previous log file
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.FileHandler):
+            logger.removeHandler(handler)
+            handler.close()
+    _log_file = requested
     
-    # Console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.WARNING)
-    console_handler.setFormatter(formatter)
+    # File handler; the file is opened on the first record, so processes
+    # that never log do not touch the filesystem
+    try:
+        file_handler = logging.FileHandler(log_file or get_path('log_file'), delay=True)
+        file_handler.setLevel(level)
+        file_handler.setFormatter(formatter)
+        logger.addHandler(file_handler)
+        file_error = None
+    except OSError as e:
+        # e.g. a read-only filesystem: keep logging to the console
+        file_error = e
     
-    # Add handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Console handler
+    if not any(type(handler) is logging.StreamHandler for handler in logger.handlers):
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.WARNING)
+        console_handler.setFormatter(formatter)
+        logger.addHandler(console_handler)
     
+    if file_error is not None:
+        logger.warning(f"File logging disabled: {file_error}")
+        
     return logger
 
+def _follow_log_file():
+    """Point an already configured logger at the current PATHS['log_file']"""
+    if logging.getLogger('SpeechToText').handlers:
+        setup_logging()
+
+settings.add_listener(_follow_log_file)
+
 def save_transcription(text, file_path, append=False):
     """
     Save transcription to file